@@ -0,0 +1,175 @@
+"""Fixtures and reporting for the Aton Storage benchmarks.
+
+Run from the repository root with:
+
+    pip install -r benchmarks/requirements.txt
+    pytest benchmarks -s [--benchmark-json results.json]
+
+Every benchmark adds rows to a report printed at the end of the session and,
+with --benchmark-json, saved to a file that can be compared between versions.
+The import time and the setup time of a plant, which slow down every start of
+Home Assistant, also fail their benchmark when they exceed their budget.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+import json
+from pathlib import Path
+import statistics
+import tracemalloc
+
+import pytest
+
+pytest_plugins = ["pytest_homeassistant_custom_component"]
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the --benchmark-json option."""
+    parser.addoption(
+        "--benchmark-json",
+        metavar="PATH",
+        help="save the benchmark results to PATH as JSON",
+    )
+
+
+@dataclass(slots=True)
+class BenchmarkResult:
+    """Latency percentiles and allocations of one measured operation."""
+
+    name: str
+    entries: int
+    payload: str
+    samples: int
+    # Latencies in microseconds
+    p50: float
+    p90: float
+    p99: float
+    max: float
+    # Peak bytes allocated over the runs, and blocks left alive per run
+    peak_bytes: int
+    retained_blocks: float
+
+
+class BenchmarkReport:
+    """Collects the benchmark results of a session."""
+
+    def __init__(self) -> None:
+        self.results: list[BenchmarkResult] = []
+
+    def add(
+        self,
+        name: str,
+        entries: int,
+        payload: str,
+        latencies: list[float],
+        allocations: tuple[int, float] = (0, 0.0),
+    ) -> None:
+        """Add the latencies, in seconds, of an operation."""
+        micros = sorted(latency * 1e6 for latency in latencies)
+        if len(micros) > 1:
+            cuts = statistics.quantiles(micros, n=100, method="inclusive")
+            p50, p90, p99 = cuts[49], cuts[89], cuts[98]
+        else:
+            p50 = p90 = p99 = micros[0]
+        self.results.append(
+            BenchmarkResult(
+                name,
+                entries,
+                payload,
+                len(micros),
+                p50,
+                p90,
+                p99,
+                micros[-1],
+                *allocations,
+            )
+        )
+
+    def format(self) -> str:
+        """Return the results as a text table."""
+        lines = [
+            f"{'benchmark':<14}{'entries':>8} {'payload':<14}{'samples':>8}"
+            f"{'p50 us':>11}{'p90 us':>11}{'p99 us':>11}{'max us':>11}"
+            f"{'peak B':>10}{'kept/run':>10}"
+        ]
+        for res in self.results:
+            lines.append(
+                f"{res.name:<14}{res.entries:>8} {res.payload:<14}{res.samples:>8}"
+                f"{res.p50:>11.1f}{res.p90:>11.1f}{res.p99:>11.1f}{res.max:>11.1f}"
+                f"{res.peak_bytes:>10}{res.retained_blocks:>10.1f}"
+            )
+        return "\n".join(lines)
+
+
+def measure_allocations(run: Callable[[], object], runs: int) -> tuple[int, float]:
+    """Return the peak bytes allocated by run and the blocks it retains.
+
+    Tracing slows everything down, so this is a separate pass from the
+    latency measurements.
+    """
+    tracemalloc.start()
+    try:
+        base = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        for _ in range(runs):
+            run()
+        _, peak = tracemalloc.get_traced_memory()
+        return peak - start, _retained(base, runs)
+    finally:
+        tracemalloc.stop()
+
+
+async def async_measure_allocations(
+    run: Callable[[], object], runs: int
+) -> tuple[int, float]:
+    """Return the peak bytes allocated by the coroutine function run."""
+    tracemalloc.start()
+    try:
+        base = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        for _ in range(runs):
+            await run()
+        _, peak = tracemalloc.get_traced_memory()
+        return peak - start, _retained(base, runs)
+    finally:
+        tracemalloc.stop()
+
+
+def _retained(base: tracemalloc.Snapshot, runs: int) -> float:
+    """Return the blocks allocated since base and still alive, per run."""
+    diff = tracemalloc.take_snapshot().compare_to(base, "filename")
+    return sum(stat.count_diff for stat in diff) / runs
+
+
+_REPORT = BenchmarkReport()
+
+
+@pytest.fixture(scope="session")
+def benchmark_report() -> BenchmarkReport:
+    """Return the report of the session."""
+    return _REPORT
+
+
+def pytest_terminal_summary(
+    terminalreporter: pytest.TerminalReporter, config: pytest.Config
+) -> None:
+    """Print the report and save it if asked to."""
+    if not _REPORT.results:
+        return
+    terminalreporter.write_sep("=", "Aton Storage benchmarks")
+    terminalreporter.write_line(_REPORT.format())
+    if path := config.getoption("--benchmark-json"):
+        Path(path).write_text(
+            json.dumps([asdict(res) for res in _REPORT.results], indent=2),
+            encoding="utf-8",
+        )
+        terminalreporter.write_line(f"Saved to {path}")
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations) -> Iterator[None]:
+    """Let Home Assistant load the integration from custom_components."""
+    yield
@@ -0,0 +1,265 @@
+"""Cost of setting up, refreshing and fanning out updates to many plants.
+
+Each benchmark runs for 1, 10 and 100 config entries, with a payload that
+never changes (so most state writes are skipped) and with one that changes
+at every poll (so every entity writes).
+"""
+from __future__ import annotations
+
+from collections.abc import Iterator
+from itertools import count
+import json
+import statistics
+import time
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import async_get_platforms
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+
+from custom_components.aton_storage.api import AtonAPI, AtonSnapshot
+from custom_components.aton_storage.const import DOMAIN
+from custom_components.aton_storage.coordinator import ApiCoordinator
+from custom_components.aton_storage.entity import ChangeAwareEntity
+from custom_components.aton_storage.scheduler import (
+    DATA_SCHEDULER,
+    AtonPollScheduler,
+)
+
+from .conftest import BenchmarkReport, async_measure_allocations, measure_allocations
+
+ENTRIES = (1, 10, 100)
+PAYLOADS = ("fixed", "changing")
+# Measured rounds over all the plants
+ROUNDS = 20
+ALLOCATION_ROUNDS = 3
+# Median seconds allowed to set up a plant. Raise it only along with the
+# change that needs it.
+SETUP_BUDGET = 0.250
+
+PAYLOAD = {
+    "soc": "55.5",
+    "pUtenze": "400",
+    "pBatteria": "-100",
+    "pSolare": "900",
+    "pRete": "-400",
+    "status": "18",
+    "data": "17/10/2026 10:00:00",
+    "eVenduta": "10",
+    "ePannelli": "20",
+    "eBatteria": "30",
+    "eComprata": "40",
+    "utenzeV": "230",
+    "gridV": "231",
+    "gridHz": "50",
+}
+
+
+def _payload(changing: bool, step: int) -> dict:
+    """Return the monitor payload of the given poll."""
+    if not changing:
+        return PAYLOAD
+    return {
+        **PAYLOAD,
+        "soc": str(50 + step % 50),
+        "pUtenze": str(400 + step),
+        "pSolare": str(900 + 2 * step),
+        "pRete": str(-400 - step),
+        "status": "18" if step % 2 else "20",
+        "eVenduta": str(10 + step),
+        "ePannelli": str(20 + step),
+        "eComprata": str(40 + step),
+        "data": f"17/10/2026 10:{step // 60 % 60:02d}:{step % 60:02d}",
+    }
+
+
+class FakeAtonAPI(AtonAPI):
+    """AtonAPI answering from memory, parsing included."""
+
+    changing = False
+    _steps = count()
+
+    async def _get(self, page: str, params: dict) -> str:
+        if page == "set_request.php":
+            return "ok"
+        return json.dumps(_payload(self.changing, next(self._steps)))
+
+
+@pytest.fixture(params=PAYLOADS)
+def payload(request: pytest.FixtureRequest) -> Iterator[str]:
+    """Patch the integration to use FakeAtonAPI with the given payload."""
+    with patch.object(FakeAtonAPI, "changing", request.param == "changing"), patch(
+        "custom_components.aton_storage.AtonAPI", FakeAtonAPI
+    ):
+        yield request.param
+
+
+async def _async_setup(
+    hass: HomeAssistant, entries: int
+) -> tuple[list[ApiCoordinator], list[float]]:
+    """Set up plants one at a time, return their coordinators and setup times."""
+    # No account spacing: the benchmarks poll the same plant back to back
+    hass.data[DATA_SCHEDULER] = AtonPollScheduler(hass, account_spacing=0)
+    assert await async_setup_component(hass, DOMAIN, {})
+    setup_times = []
+    for n in range(entries):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            title=f"Aton Storage plant{n}",
+            unique_id=f"SN{n:05d}",
+            data={
+                "username": f"plant{n}",
+                "password": "password",
+                "sn": f"SN{n:05d}",
+                "id_impianto": str(n + 1),
+                "cookies": {"PHPSESSID": "benchmark"},
+                "cookies_expire": None,
+            },
+        )
+        entry.add_to_hass(hass)
+        start = time.perf_counter()
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        setup_times.append(time.perf_counter() - start)
+    await hass.async_block_till_done()
+    coordinators: list[ApiCoordinator] = list(hass.data[DOMAIN].values())
+    assert len(coordinators) == entries
+    for coordinator in coordinators:
+        # The benchmarks drive the polls themselves
+        coordinator.scheduler.async_remove(coordinator)
+    return coordinators, setup_times
+
+
+def _entities(hass: HomeAssistant) -> list[ChangeAwareEntity]:
+    """Return every change-aware entity of the integration."""
+    return [
+        entity
+        for platform in async_get_platforms(hass, DOMAIN)
+        for entity in platform.entities.values()
+        if isinstance(entity, ChangeAwareEntity)
+    ]
+
+
+@pytest.mark.parametrize("entries", ENTRIES)
+async def test_setup_entry(
+    hass: HomeAssistant,
+    benchmark_report: BenchmarkReport,
+    entries: int,
+    payload: str,
+) -> None:
+    """Time async_setup_entry of every plant."""
+    _, setup_times = await _async_setup(hass, entries)
+    benchmark_report.add("setup_entry", entries, payload, setup_times)
+    assert statistics.median(setup_times) <= SETUP_BUDGET
+
+
+@pytest.mark.parametrize("entries", ENTRIES)
+async def test_refresh(
+    hass: HomeAssistant,
+    benchmark_report: BenchmarkReport,
+    entries: int,
+    payload: str,
+) -> None:
+    """Time a full coordinator refresh: fetch, parse and fan-out."""
+    coordinators, _ = await _async_setup(hass, entries)
+    latencies = []
+    for _ in range(ROUNDS):
+        for coordinator in coordinators:
+            start = time.perf_counter()
+            await coordinator.async_refresh()
+            latencies.append(time.perf_counter() - start)
+    assert all(c.last_update_success for c in coordinators)
+
+    async def refresh_all() -> None:
+        for coordinator in coordinators:
+            await coordinator.async_refresh()
+
+    allocations = await async_measure_allocations(refresh_all, ALLOCATION_ROUNDS)
+    benchmark_report.add(
+        "refresh",
+        entries,
+        payload,
+        latencies,
+        (allocations[0], allocations[1] / entries),
+    )
+
+
+@pytest.mark.parametrize("entries", ENTRIES)
+async def test_fan_out(
+    hass: HomeAssistant,
+    benchmark_report: BenchmarkReport,
+    entries: int,
+    payload: str,
+) -> None:
+    """Time the delivery of a snapshot to the entities of a plant."""
+    coordinators, _ = await _async_setup(hass, entries)
+    changing = payload == "changing"
+    snapshots = [
+        AtonSnapshot.from_payload(_payload(changing, step), dt_util.utcnow())
+        for step in range(2)
+    ]
+    rounds = count()
+    latencies = []
+
+    def fan_out_all() -> None:
+        snapshot = snapshots[next(rounds) % 2]
+        for coordinator in coordinators:
+            start = time.perf_counter()
+            coordinator.async_set_updated_data(snapshot)
+            latencies.append(time.perf_counter() - start)
+
+    for _ in range(ROUNDS):
+        fan_out_all()
+    measured = latencies[:]
+    allocations = measure_allocations(fan_out_all, ALLOCATION_ROUNDS)
+    benchmark_report.add(
+        "fan_out",
+        entries,
+        payload,
+        measured,
+        (allocations[0], allocations[1] / entries),
+    )
+
+
+@pytest.mark.parametrize("entries", ENTRIES)
+async def test_write_state(
+    hass: HomeAssistant,
+    benchmark_report: BenchmarkReport,
+    entries: int,
+    payload: str,
+) -> None:
+    """Time async_write_ha_state of a single entity."""
+    coordinators, _ = await _async_setup(hass, entries)
+    entities = _entities(hass)
+    changing = payload == "changing"
+    snapshots = [
+        AtonSnapshot.from_payload(_payload(changing, step), dt_util.utcnow())
+        for step in range(2)
+    ]
+    rounds = count()
+    latencies = []
+
+    def write_all() -> None:
+        snapshot = snapshots[next(rounds) % 2]
+        for coordinator in coordinators:
+            coordinator.data = snapshot
+        for entity in entities:
+            entity.update()
+            start = time.perf_counter()
+            entity.async_write_ha_state()
+            latencies.append(time.perf_counter() - start)
+
+    for _ in range(ROUNDS):
+        write_all()
+    measured = latencies[:]
+    allocations = measure_allocations(write_all, ALLOCATION_ROUNDS)
+    benchmark_report.add(
+        "write_state",
+        entries,
+        payload,
+        measured,
+        (allocations[0], allocations[1] / len(entities)),
+    )
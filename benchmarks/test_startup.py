@@ -0,0 +1,105 @@
+"""Import time of the integration, with a budget.
+
+Home Assistant imports the integration and its platforms while it starts,
+so their import time is on the critical path of every restart, along with
+async_setup_entry (see test_setup_entry in test_coordinator.py). Each run
+imports them in a fresh interpreter with -X importtime, after the parts of
+Home Assistant that are loaded before any integration, so only the cost of
+the integration itself is measured.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+
+from .conftest import BenchmarkReport
+
+RUNS = 5
+# Median seconds allowed to import the integration and its platforms. Raise
+# it only along with the change that needs it.
+IMPORT_BUDGET = 0.150
+
+PACKAGE = "custom_components.aton_storage"
+# What Home Assistant has loaded before it imports an integration
+PRELOADED = (
+    "homeassistant.components.binary_sensor",
+    "homeassistant.components.sensor",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.aiohttp_client",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.restore_state",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+)
+# Imported at startup and when the first entry is set up
+STARTUP_MODULES = (PACKAGE, f"{PACKAGE}.sensor", f"{PACKAGE}.binary_sensor")
+# Only imported once the options or the services need them
+LAZY_MODULES = (
+    f"{PACKAGE}.archive",
+    f"{PACKAGE}.relay",
+    f"{PACKAGE}.tariff",
+)
+_MARK = "aton-storage-import-start"
+# Uses __import__, as -X importtime doesn't log importlib.import_module
+_SCRIPT = f"""
+import json, sys
+for name in {PRELOADED!r}:
+    __import__(name)
+print({_MARK!r}, file=sys.stderr, flush=True)
+for name in {STARTUP_MODULES!r}:
+    __import__(name)
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def _import_run() -> tuple[dict[str, tuple[float, float]], set[str]]:
+    """Import the integration in a fresh interpreter.
+
+    Returns the self and cumulative import times, in seconds, of every
+    module imported after PRELOADED, and the modules loaded at the end.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _SCRIPT],
+        cwd=Path(__file__).parents[1],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    times = {}
+    _, _, lines = result.stderr.partition(_MARK)
+    for line in lines.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        if own.strip().isdigit():
+            times[name.strip()] = (int(own) / 1e6, int(cumulative) / 1e6)
+    return times, set(json.loads(result.stdout))
+
+
+def test_import_time(benchmark_report: BenchmarkReport) -> None:
+    """Time the import of every module of the integration."""
+    # Compile the bytecode first, as an installed integration has it
+    _import_run()
+    cumulative: dict[str, list[float]] = {}
+    totals = []
+    for _ in range(RUNS):
+        times, loaded = _import_run()
+        for name, (_, module_cumulative) in times.items():
+            if name.startswith(PACKAGE):
+                cumulative.setdefault(name, []).append(module_cumulative)
+        # The startup modules and everything they import first
+        totals.append(sum(times[name][1] for name in STARTUP_MODULES if name in times))
+        assert not loaded.intersection(LAZY_MODULES)
+
+    for name, latencies in sorted(
+        cumulative.items(), key=lambda item: -statistics.median(item[1])
+    ):
+        benchmark_report.add(
+            "import", 0, name[len(PACKAGE) + 1 :] or "__init__", latencies
+        )
+    benchmark_report.add("import", 0, "total", totals)
+    assert statistics.median(totals) <= IMPORT_BUDGET
@@ -1,30 +1,168 @@
 """The Aton Storage integration."""
 from __future__ import annotations
 
+import logging
+import time
+
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE, Platform
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.typing import ConfigType
+
+from .api import AtonAPI
+from .const import (
+    CONF_ARCHIVE,
+    CONF_ARCHIVE_DAYS,
+    CONF_RELAY_SERVE,
+    CONF_RELAY_TOKEN,
+    CONF_RELAY_URL,
+    DATA_RELAY,
+    DEFAULT_ARCHIVE_DAYS,
+    DOMAIN,
+    SETUP_TIME_BUDGET,
+)
+from .coordinator import ApiCoordinator
+from .scheduler import async_get_scheduler
+from .services import async_setup_services
+from .transport import (
+    CONF_TRANSPORT,
+    DATA_TRANSPORT,
+    TRANSPORT_SCHEMA,
+    async_get_transport,
+)
+
+# Forwarded concurrently by async_forward_entry_setups
+PLATFORMS: list[Platform] = [Platform.BINARY_SENSOR, Platform.SENSOR]
 
-from .const import DOMAIN
+_LOGGER = logging.getLogger(__name__)
 
-# TODO List the platforms that you want to support.
-# For your initial PR, limit it to 1 platform.
-PLATFORMS: list[Platform] = [Platform.SENSOR]
+CONFIG_SCHEMA = vol.Schema(
+    {DOMAIN: vol.Schema({vol.Optional(CONF_TRANSPORT): TRANSPORT_SCHEMA})},
+    extra=vol.ALLOW_EXTRA,
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Read the transport settings and register the services."""
+    if transport := config.get(DOMAIN, {}).get(CONF_TRANSPORT):
+        hass.data[DATA_TRANSPORT] = transport
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Aton Storage from a config entry."""
+    start = time.monotonic()
+
+    api = AtonAPI(
+        async_get_transport(hass),
+        entry.data["username"],
+        entry.data["sn"],
+        entry.data["id_impianto"],
+    )
+    scheduler = async_get_scheduler(hass)
+    coordinator = ApiCoordinator(hass, entry, api, scheduler)
+    _async_setup_relay(hass, entry, coordinator)
+    if entry.options.get(CONF_ARCHIVE, False):
+        # Like the relay, the archive is only imported when it is used
+        from .archive import AtonArchive  # pylint: disable=import-outside-toplevel
 
-    hass.data.setdefault(DOMAIN, {entry.entry_id: entry})
+        archive = coordinator.archive = AtonArchive(
+            hass,
+            api.sn,
+            entry.options.get(CONF_ARCHIVE_DAYS, DEFAULT_ARCHIVE_DAYS),
+        )
 
+        async def _async_flush_archive(_event: Event) -> None:
+            # Entries are not unloaded when Home Assistant stops
+            await archive.async_flush()
+
+        entry.async_on_unload(
+            hass.bus.async_listen(EVENT_HOMEASSISTANT_FINAL_WRITE, _async_flush_archive)
+        )
+    await coordinator.flow_energy.async_load()
+    if coordinator.cost is not None:
+        await coordinator.cost.async_load()
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+
+    # Entities restore their last state, so nothing waits for the cloud:
+    # the first poll runs in the background once the scheduler picks it up.
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    if coordinator.relay is None:
+        scheduler.async_add(coordinator)
+    else:
+        entry.async_create_background_task(
+            hass, coordinator.async_follow_relay(), f"{coordinator.name} relay"
+        )
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    coordinator.setup_time = time.monotonic() - start
+    if coordinator.setup_time > SETUP_TIME_BUDGET:
+        _LOGGER.warning(
+            "Setting up %s took %.3f seconds, over the %.1f seconds budget",
+            entry.title,
+            coordinator.setup_time,
+            SETUP_TIME_BUDGET,
+        )
+    else:
+        _LOGGER.debug("Set up %s in %.3f seconds", entry.title, coordinator.setup_time)
 
     return True
 
 
+@callback
+def _async_setup_relay(
+    hass: HomeAssistant, entry: ConfigEntry, coordinator: ApiCoordinator
+) -> None:
+    """Read the plant from a relay, or serve it to others, as configured."""
+    if not (entry.options.get(CONF_RELAY_URL) or entry.options.get(CONF_RELAY_SERVE)):
+        return
+    # The HTTP server is only needed with a relay
+    from .relay import (  # pylint: disable=import-outside-toplevel
+        AtonRelayClient,
+        AtonRelayServer,
+        async_get_relay_servers,
+    )
+
+    if url := entry.options.get(CONF_RELAY_URL):
+        coordinator.relay = AtonRelayClient(
+            async_get_clientsession(hass),
+            url,
+            entry.options.get(CONF_RELAY_TOKEN, ""),
+            coordinator.api.sn,
+        )
+    if entry.options.get(CONF_RELAY_SERVE):
+        if "http" not in hass.config.components:
+            _LOGGER.warning(
+                "Cannot relay %s: the HTTP server is not loaded", entry.title
+            )
+            return
+        coordinator.relay_server = AtonRelayServer()
+        async_get_relay_servers(hass)[coordinator.api.sn] = coordinator.relay_server
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry when its options change."""
+    coordinator: ApiCoordinator = hass.data[DOMAIN][entry.entry_id]
+    # The session cookies are saved in the entry data: ignore those updates
+    if dict(entry.options) != coordinator.options:
+        await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator: ApiCoordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator.scheduler.async_remove(coordinator)
+        await coordinator.flow_energy.async_save()
+        if coordinator.cost is not None:
+            await coordinator.cost.async_save()
+        if coordinator.archive is not None:
+            await coordinator.archive.async_flush()
+        if coordinator.relay_server is not None:
+            hass.data[DATA_RELAY].pop(coordinator.api.sn, None)
 
     return unload_ok
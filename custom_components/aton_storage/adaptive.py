@@ -0,0 +1,68 @@
+"""Adaptive poll interval driven by how fast the plant is changing."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from .api import AtonSnapshot
+
+# Growth factor applied to the interval after every quiet poll
+BACKOFF_FACTOR = 1.5
+# A power reading moving by more than this fraction is a fast transition...
+ACTIVITY_RATIO = 0.2
+# ...unless the change is below this many watts, which is just noise
+ACTIVITY_FLOOR = 100
+
+
+class AdaptiveInterval:
+    """Chooses the next poll interval from the last two snapshots.
+
+    A change in the power-direction flags, or a large swing in any power
+    reading, brings the interval straight down to the minimum. Quiet polls
+    stretch it by BACKOFF_FACTOR, and an idle plant at night (no solar
+    production and an idle battery) goes straight to the maximum.
+    """
+
+    def __init__(
+        self, min_interval: timedelta, max_interval: timedelta, initial: timedelta
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min(max(initial, min_interval), max_interval)
+        self._flags: tuple[bool, ...] | None = None
+        self._powers: tuple[int, ...] | None = None
+
+    def update(self, snapshot: AtonSnapshot) -> timedelta:
+        """Return the interval to wait before polling again."""
+        flags = (
+            snapshot.is_grid_to_house,
+            snapshot.is_solar_to_battery,
+            snapshot.is_solar_to_grid,
+            snapshot.is_battery_to_house,
+            snapshot.is_solar_to_house,
+            snapshot.is_grid_to_battery,
+            snapshot.is_battery_to_grid,
+        )
+        powers = (
+            snapshot.solar_production,
+            snapshot.house_consumption,
+            snapshot.battery_power,
+            snapshot.grid_power,
+        )
+        if self._flags is not None and (
+            flags != self._flags or self._is_swing(self._powers, powers)
+        ):
+            self.interval = self.min_interval
+        elif snapshot.solar_production == 0 and snapshot.battery_power == 0:
+            self.interval = self.max_interval
+        else:
+            self.interval = min(self.interval * BACKOFF_FACTOR, self.max_interval)
+        self._flags, self._powers = flags, powers
+        return self.interval
+
+    @staticmethod
+    def _is_swing(old: tuple[int, ...], new: tuple[int, ...]) -> bool:
+        for before, after in zip(old, new):
+            delta = abs(after - before)
+            if delta > ACTIVITY_FLOOR and delta > abs(before) * ACTIVITY_RATIO:
+                return True
+        return False
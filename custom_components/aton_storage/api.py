@@ -0,0 +1,235 @@
+"""Asyncio client for the Aton Green Storage cloud."""
+from __future__ import annotations
+
+from collections.abc import Collection
+from dataclasses import dataclass, fields
+from datetime import datetime
+import logging
+
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import json_loads
+
+from .const import (
+    DEFAULT_REQUEST_TIMEOUT,
+    ENTITY_GROUPS,
+    GROUP_ENERGY,
+    GROUP_FLAGS,
+    GROUP_POWER,
+    GROUP_SELF_SUFFICIENCY,
+)
+from .transport import AtonTransport, TransportError
+
+_LOGGER = logging.getLogger(__name__)
+
+DATETIME_FORMAT = "%d/%m/%Y %H:%M:%S"
+
+
+class NoAuth(Exception):
+    """User did not authenticate before using the API"""
+
+
+class CommunicationFailed(Exception):
+    """Cannot communicate with the server"""
+
+
+@dataclass(frozen=True, slots=True)
+class AtonSnapshot:
+    """Immutable status of a plant, as read by a single poll.
+
+    Only the fields of the groups the snapshot was parsed for are set, the
+    others are None.
+    """
+
+    fetched_at: datetime
+    last_update: str
+
+    # GROUP_POWER
+    battery_status: float | None = None
+    house_consumption: int | None = None
+    solar_production: int | None = None
+    battery_power: int | None = None
+    grid_power: int | None = None
+    house_voltage: float | None = None
+    grid_voltage: float | None = None
+    grid_frequency: float | None = None
+
+    # GROUP_FLAGS
+    is_grid_to_house: bool | None = None
+    is_solar_to_battery: bool | None = None
+    is_solar_to_grid: bool | None = None
+    is_battery_to_house: bool | None = None
+    is_solar_to_house: bool | None = None
+    is_grid_to_battery: bool | None = None
+    is_battery_to_grid: bool | None = None
+
+    # GROUP_ENERGY
+    sold_energy: int | None = None
+    solar_energy: int | None = None
+    self_consumed_energy: int | None = None
+    bought_energy: int | None = None
+    consumed_energy: int | None = None
+
+    # GROUP_SELF_SUFFICIENCY
+    self_sufficiency: float | None = None
+
+    def as_dict(self) -> dict:
+        """Return the fields as a JSON-friendly dict."""
+        data = {name: getattr(self, name) for name in _SNAPSHOT_FIELDS}
+        data["fetched_at"] = self.fetched_at.isoformat()
+        return data
+
+    @classmethod
+    def from_payload(
+        cls,
+        data: dict,
+        fetched_at: datetime,
+        groups: Collection[str] = ENTITY_GROUPS,
+    ) -> AtonSnapshot:
+        """Build a snapshot of the given groups from a get_monitor.php payload."""
+        fields: dict = {}
+        if GROUP_POWER in groups:
+            fields.update(
+                battery_status=float(data["soc"]),
+                house_consumption=int(data["pUtenze"]),
+                solar_production=int(data["pSolare"]),
+                battery_power=int(data["pBatteria"]),
+                grid_power=int(data["pRete"]),
+                house_voltage=float(data["utenzeV"]),
+                grid_voltage=float(data["gridV"]),
+                grid_frequency=float(data["gridHz"]),
+            )
+        if GROUP_FLAGS in groups:
+            status = int(data["status"])
+            fields.update(
+                is_grid_to_house=status & 1 == 1,
+                is_solar_to_battery=status & 2 == 2,
+                is_solar_to_grid=status & 4 == 4,
+                is_battery_to_house=status & 8 == 8,
+                is_solar_to_house=status & 16 == 16,
+                is_grid_to_battery=status & 32 == 32,
+                is_battery_to_grid=status & 64 == 64,
+            )
+        if GROUP_ENERGY in groups or GROUP_SELF_SUFFICIENCY in groups:
+            self_consumed_energy = int(data["eBatteria"])
+            bought_energy = int(data["eComprata"])
+            consumed_energy = bought_energy + self_consumed_energy
+            if GROUP_ENERGY in groups:
+                fields.update(
+                    sold_energy=int(data["eVenduta"]),
+                    solar_energy=int(data["ePannelli"]),
+                    self_consumed_energy=self_consumed_energy,
+                    bought_energy=bought_energy,
+                    consumed_energy=consumed_energy,
+                )
+            if GROUP_SELF_SUFFICIENCY in groups and consumed_energy:
+                fields["self_sufficiency"] = 100 - bought_energy / consumed_energy * 100
+        return cls(
+            fetched_at=fetched_at,
+            last_update=datetime.strptime(data["data"], DATETIME_FORMAT).isoformat(),
+            **fields,
+        )
+
+
+_SNAPSHOT_FIELDS = tuple(field.name for field in fields(AtonSnapshot))
+
+
+class AtonAPI:
+    """Talks to the Aton cloud through a transport."""
+
+    def __init__(
+        self,
+        transport: AtonTransport,
+        username: str | None = None,
+        sn: str | None = None,
+        id_impianto: str | None = None,
+    ) -> None:
+        self.transport = transport
+        self.username = username
+        self.sn = sn
+        self.id_impianto = id_impianto
+        self.cookies: dict[str, str] | None = None
+        # Unix time at which the first of the session cookies expires
+        self.cookies_expire: float | None = None
+        self.interval = 30
+        self.request_timeout: float = DEFAULT_REQUEST_TIMEOUT
+        # Snapshot groups parsed from the monitor payload
+        self.groups: frozenset[str] = frozenset(ENTITY_GROUPS)
+        # Last monitor payload, kept for the diagnostics
+        self.last_payload: dict | None = None
+        self.last_payload_size: int | None = None
+
+    async def authenticate(self, username: str, password: str) -> bool:
+        """Try to authenticate the user and save all user specific data"""
+        try:
+            resp = await self.transport.async_request(
+                "POST",
+                "index.php",
+                data={"username": username, "password": password},
+                timeout=self.request_timeout,
+            )
+        except TransportError as err:
+            raise CommunicationFailed(err) from err
+        if resp.status != 200:
+            return False
+        text = resp.text
+
+        sn_start = text.find("var sn")
+        sn_start = text.find('"', sn_start, sn_start + 30) + 1
+        sn_end = text.find('"', sn_start + 1, sn_start + 50)
+        sn = text[sn_start:sn_end]
+
+        id_start = text.find("var idImpianto")
+        id_start = text.find("=", id_start, id_start + 30) + 1
+        id_end = text.find(";", id_start + 1, id_start + 50)
+        try:
+            id_impianto = int(text[id_start:id_end])
+        except ValueError:
+            return False
+
+        if sn and id_impianto > 0 and resp.cookies:
+            self.id_impianto = str(id_impianto)
+            self.sn = sn
+            self.username = username
+            self.cookies = resp.cookies
+            self.cookies_expire = resp.cookies_expire
+            return True
+
+        return False
+
+    async def _get(self, page: str, params: dict) -> str:
+        """Send an authenticated GET and return the body."""
+        try:
+            resp = await self.transport.async_request(
+                "GET",
+                page,
+                params=params,
+                cookies=self.cookies,
+                timeout=self.request_timeout,
+            )
+        except TransportError as err:
+            raise CommunicationFailed(err) from err
+        if resp.status == 401:
+            raise NoAuth("Re-authentication needed")
+        if resp.status != 200:
+            raise CommunicationFailed(f"{page} returned {resp.status}")
+        return resp.text
+
+    async def fetch_data(self) -> AtonSnapshot:
+        """Fetch the current status of the plant from the website"""
+        res = await self._get(
+            "set_request.php",
+            {"sn": self.sn, "request": "MONITOR", "intervallo": self.interval},
+        )
+        if res != "ok":
+            raise CommunicationFailed("Cannot send monitor command")
+        res = await self._get("get_monitor.php", {"sn": self.sn})
+        # The payload is a single small object: orjson decodes it in a few
+        # microseconds, well under the cost of a hop to the executor.
+        try:
+            payload = json_loads(res)
+            snapshot = AtonSnapshot.from_payload(payload, dt_util.utcnow(), self.groups)
+        except (ValueError, KeyError) as err:
+            raise CommunicationFailed(f"Unexpected monitor payload: {err}") from err
+        self.last_payload = payload
+        self.last_payload_size = len(res)
+        return snapshot
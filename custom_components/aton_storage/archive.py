@@ -0,0 +1,228 @@
+"""Local archive of the raw monitor payloads.
+
+Every payload is packed into a fixed-size binary record and appended to a
+gzip file per UTC day, in <config>/aton_storage/archive/<serial>/. Records
+are buffered and written in batches from the executor, each batch as a new
+gzip member, so a file is never rewritten. Members are read back only once
+their checksum matches, and reading resumes at the next member after a
+damaged one, so an interrupted write costs at most its own batch. Exports
+stream the records into a CSV file one member at a time, whatever the size
+of the archive.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator
+import csv
+from datetime import date, datetime, timedelta
+import gzip
+import logging
+from pathlib import Path
+import struct
+import zlib
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util, slugify
+
+from .api import DATETIME_FORMAT
+from .const import ARCHIVE_BATCH_SIZE, ARCHIVE_FLUSH_DELAY, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# Payload keys archived, in record order, with how they are converted
+ARCHIVE_FIELDS: tuple[tuple[str, type], ...] = (
+    ("soc", float),
+    ("pUtenze", int),
+    ("pSolare", int),
+    ("pBatteria", int),
+    ("pRete", int),
+    ("status", int),
+    ("eVenduta", int),
+    ("ePannelli", int),
+    ("eBatteria", int),
+    ("eComprata", int),
+    ("utenzeV", float),
+    ("gridV", float),
+    ("gridHz", float),
+)
+# Time of the poll and of the reading, as Unix times, then the fields. The
+# version in the file names changes with the layout.
+RECORD = struct.Struct(
+    "<dd" + "".join("d" if convert is float else "i" for _, convert in ARCHIVE_FIELDS)
+)
+FILE_SUFFIX = ".v1.gz"
+
+# Compressed bytes read at a time by the exports
+_READ_SIZE = 65536
+# Makes zlib read and write gzip members
+_GZIP_WBITS = zlib.MAX_WBITS | 16
+# Start of every gzip member: the magic number and the deflate method
+_GZIP_MAGIC = b"\x1f\x8b\x08"
+
+
+def archive_dir(hass: HomeAssistant, sn: str) -> Path:
+    """Return the directory holding the archive of a plant."""
+    return Path(hass.config.path(DOMAIN, "archive", slugify(sn)))
+
+
+def pack_payload(fetched_at: datetime, payload: dict) -> bytes:
+    """Pack a monitor payload into a record."""
+    last_update = datetime.strptime(payload["data"], DATETIME_FORMAT).replace(
+        tzinfo=dt_util.DEFAULT_TIME_ZONE
+    )
+    return RECORD.pack(
+        fetched_at.timestamp(),
+        last_update.timestamp(),
+        *(convert(payload[key]) for key, convert in ARCHIVE_FIELDS),
+    )
+
+
+class AtonArchive:
+    """Appends the payloads of a plant to its archive."""
+
+    def __init__(self, hass: HomeAssistant, sn: str, keep_days: int) -> None:
+        self.hass = hass
+        self.path = archive_dir(hass, sn)
+        # Days of files kept, 0 to keep everything
+        self.keep_days = keep_days
+        self._buffer: list[tuple[date, bytes]] = []
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        # Batches are written one at a time, in order
+        self._write_lock = asyncio.Lock()
+
+    @callback
+    def append(self, fetched_at: datetime, payload: dict) -> None:
+        """Buffer a payload, writing the buffer once it is large enough."""
+        try:
+            record = pack_payload(fetched_at, payload)
+        except (KeyError, TypeError, ValueError, struct.error) as err:
+            _LOGGER.debug("Not archiving an unexpected payload: %s", err)
+            return
+        self._buffer.append((fetched_at.date(), record))
+        if len(self._buffer) >= ARCHIVE_BATCH_SIZE:
+            self._async_schedule_flush(0)
+        elif self._unsub_flush is None:
+            self._async_schedule_flush(ARCHIVE_FLUSH_DELAY)
+
+    @callback
+    def _async_schedule_flush(self, delay: float) -> None:
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+
+        @callback
+        def _flush(_now: datetime) -> None:
+            self._unsub_flush = None
+            self.hass.async_create_background_task(
+                self.async_flush(), f"{DOMAIN} archive flush"
+            )
+
+        self._unsub_flush = async_call_later(self.hass, delay, _flush)
+
+    async def async_flush(self) -> None:
+        """Write the buffered records."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        async with self._write_lock:
+            await self.hass.async_add_executor_job(self._write, batch)
+
+    def _write(self, batch: list[tuple[date, bytes]]) -> None:
+        """Append a batch to the files of its days, and drop the old ones."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        by_day: dict[date, list[bytes]] = {}
+        for day, record in batch:
+            by_day.setdefault(day, []).append(record)
+        for day, records in by_day.items():
+            path = self.path / f"{day.isoformat()}{FILE_SUFFIX}"
+            with gzip.open(path, "ab") as file:
+                file.write(b"".join(records))
+        if self.keep_days:
+            oldest = (dt_util.utcnow() - timedelta(days=self.keep_days)).date()
+            for file in self.path.glob(f"*{FILE_SUFFIX}"):
+                if _file_day(file) < oldest:
+                    file.unlink()
+
+
+def _file_day(path: Path) -> date:
+    return date.fromisoformat(path.name.removesuffix(FILE_SUFFIX))
+
+
+def _iter_members(path: Path) -> Iterator[bytes]:
+    """Yield the content of every intact gzip member of a file.
+
+    A member is yielded once zlib has checked its CRC. After a damaged or
+    truncated one, such as a batch cut short by a crash, reading resumes at
+    the next member header, so the batches appended later are still read.
+    """
+    with path.open("rb") as file:
+        pending = b""
+        while True:
+            if (start := pending.find(_GZIP_MAGIC)) == -1:
+                if not (chunk := file.read(_READ_SIZE)):
+                    return
+                # Keep the start of a header cut by the end of the chunk
+                pending = pending[1 - len(_GZIP_MAGIC) :] + chunk
+                continue
+            member = bytearray(pending[start:])
+            decompressor = zlib.decompressobj(_GZIP_WBITS)
+            content: list[bytes] = []
+            compressed = bytes(member)
+            try:
+                while True:
+                    content.append(decompressor.decompress(compressed))
+                    if decompressor.eof:
+                        break
+                    if not (compressed := file.read(_READ_SIZE)):
+                        raise EOFError("truncated member")
+                    member += compressed
+            except (zlib.error, EOFError) as err:
+                _LOGGER.warning("Skipping a damaged batch of %s: %s", path, err)
+                pending = bytes(member[1:])
+                continue
+            yield b"".join(content)
+            pending = decompressor.unused_data
+
+
+def iter_records(path: Path, start: datetime, end: datetime) -> Iterator[tuple]:
+    """Yield the records of an archive taken between start and end."""
+    if not path.is_dir():
+        return
+    first, last = start.date(), end.date()
+    files = sorted(
+        file
+        for file in path.glob(f"*{FILE_SUFFIX}")
+        if first <= _file_day(file) <= last
+    )
+    start_ts, end_ts = start.timestamp(), end.timestamp()
+    for file in files:
+        for member in _iter_members(file):
+            whole = len(member) - len(member) % RECORD.size
+            for record in RECORD.iter_unpack(member[:whole]):
+                if start_ts <= record[0] <= end_ts:
+                    yield record
+
+
+def export_csv(path: Path, start: datetime, end: datetime, output: Path) -> int:
+    """Write the records between start and end to a CSV file.
+
+    Returns the number of rows written.
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    with output.open("w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["fetched_at", "data", *(key for key, _ in ARCHIVE_FIELDS)])
+        for fetched_at, last_update, *values in iter_records(path, start, end):
+            writer.writerow(
+                [
+                    dt_util.utc_from_timestamp(fetched_at).isoformat(),
+                    dt_util.utc_from_timestamp(last_update).isoformat(),
+                    *values,
+                ]
+            )
+            rows += 1
+    return rows
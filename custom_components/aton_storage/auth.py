@@ -0,0 +1,81 @@
+"""Session handling for the Aton Storage integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .api import AtonAPI, NoAuth
+from .const import SESSION_REFRESH_MARGIN
+
+_LOGGER = logging.getLogger(__name__)
+
+CONF_COOKIES = "cookies"
+CONF_COOKIES_EXPIRE = "cookies_expire"
+
+
+class AtonSessionManager:
+    """Keeps the cloud session of a config entry alive.
+
+    The session is renewed with the stored credentials shortly before its
+    cookies expire, or as soon as the cloud rejects them. Concurrent renewals
+    are coalesced into a single login, and the new cookies are saved back to
+    the config entry so a restart can reuse them.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, api: AtonAPI) -> None:
+        self.hass = hass
+        self.entry = entry
+        self.api = api
+        api.cookies = entry.data[CONF_COOKIES]
+        api.cookies_expire = entry.data.get(CONF_COOKIES_EXPIRE)
+        self.refresh_count = 0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Number of the session currently in use."""
+        return self._generation
+
+    def expires_soon(self) -> bool:
+        """Return True if the session cookies are about to expire."""
+        expire = self.api.cookies_expire
+        return expire is not None and time.time() >= expire - SESSION_REFRESH_MARGIN
+
+    async def async_ensure_valid(self) -> None:
+        """Renew the session ahead of its expiry."""
+        if self.expires_soon():
+            await self.async_renew(self._generation)
+
+    async def async_renew(self, generation: int) -> None:
+        """Log in again, unless the session was renewed after generation.
+
+        Raises NoAuth if there are no stored credentials or the cloud rejects
+        them, CommunicationFailed if the cloud can't be reached.
+        """
+        async with self._lock:
+            if generation != self._generation:
+                # Someone else renewed the session while we were waiting
+                return
+            if (password := self.entry.data.get(CONF_PASSWORD)) is None:
+                raise NoAuth("No stored credentials, reauthentication needed")
+            _LOGGER.debug("%s: renewing the cloud session", self.api.username)
+            if not await self.api.authenticate(
+                self.entry.data[CONF_USERNAME], password
+            ):
+                raise NoAuth("Stored credentials were rejected")
+            self._generation += 1
+            self.refresh_count += 1
+            self.hass.config_entries.async_update_entry(
+                self.entry,
+                data={
+                    **self.entry.data,
+                    CONF_COOKIES: dict(self.api.cookies),
+                    CONF_COOKIES_EXPIRE: self.api.cookies_expire,
+                },
+            )
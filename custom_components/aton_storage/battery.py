@@ -0,0 +1,130 @@
+"""Battery charge time estimates."""
+from __future__ import annotations
+
+from collections import deque
+
+from .api import AtonSnapshot
+from .const import BATTERY_FIT_MIN_SAMPLES, BATTERY_FIT_MIN_SPAN
+
+# Seconds after which the time origin of a fit is moved to its oldest sample,
+# so the sums of squares don't grow large enough to lose precision
+_REBASE_AFTER = 86400
+
+
+class SlidingLinearFit:
+    """Least-squares line through the samples of the last window seconds.
+
+    The sums the fit needs are updated as samples enter and leave the
+    window, so each sample costs amortized constant time.
+    """
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self._samples: deque[tuple[float, float]] = deque()
+        self._origin = 0.0
+        self._sum_t = self._sum_y = self._sum_tt = self._sum_ty = 0.0
+
+    @property
+    def count(self) -> int:
+        """Return the number of samples in the window."""
+        return len(self._samples)
+
+    @property
+    def span(self) -> float:
+        """Return the seconds between the oldest and the newest sample."""
+        return self._samples[-1][0] - self._samples[0][0] if self._samples else 0.0
+
+    def reset(self) -> None:
+        """Forget every sample."""
+        self._samples.clear()
+        self._sum_t = self._sum_y = self._sum_tt = self._sum_ty = 0.0
+
+    def add(self, time: float, value: float) -> None:
+        """Add a sample taken at time, in seconds."""
+        if not self._samples:
+            self._origin = time
+        elif time - self._origin > _REBASE_AFTER:
+            self._rebase()
+        while self._samples and self._samples[0][0] <= time - self.window:
+            self._remove(*self._samples.popleft())
+        self._samples.append((time, value))
+        t = time - self._origin
+        self._sum_t += t
+        self._sum_y += value
+        self._sum_tt += t * t
+        self._sum_ty += t * value
+
+    def _remove(self, time: float, value: float) -> None:
+        t = time - self._origin
+        self._sum_t -= t
+        self._sum_y -= value
+        self._sum_tt -= t * t
+        self._sum_ty -= t * value
+
+    def _rebase(self) -> None:
+        samples = list(self._samples)
+        self.reset()
+        self._origin = samples[0][0]
+        for time, value in samples:
+            self.add(time, value)
+
+    @property
+    def slope(self) -> float | None:
+        """Return the slope of the line, per second."""
+        n = len(self._samples)
+        denominator = n * self._sum_tt - self._sum_t * self._sum_t
+        if n < 2 or denominator <= 0:
+            return None
+        return (n * self._sum_ty - self._sum_t * self._sum_y) / denominator
+
+    def value_at(self, time: float) -> float | None:
+        """Return the value of the line at time."""
+        if (slope := self.slope) is None:
+            return None
+        n = len(self._samples)
+        return self._sum_y / n + slope * (time - self._origin - self._sum_t / n)
+
+
+class BatteryEstimator:
+    """Estimates when the battery will be full, or down to its reserve.
+
+    Fits the battery percentage of the last window seconds with a line while
+    the battery keeps charging or discharging, and starts over when it
+    changes direction.
+    """
+
+    def __init__(self, window: float, reserve: float) -> None:
+        self.reserve = reserve
+        self._fit = SlidingLinearFit(window)
+        self._charging: bool | None = None
+        # Minutes to full charge and to the reserve, None if not predictable
+        self.time_to_full: int | None = None
+        self.time_to_reserve: int | None = None
+
+    def update(self, data: AtonSnapshot) -> None:
+        """Add the battery status of a snapshot and update the estimates."""
+        charging = data.is_solar_to_battery or data.is_grid_to_battery
+        discharging = data.is_battery_to_house or data.is_battery_to_grid
+        self.time_to_full = self.time_to_reserve = None
+        if charging == discharging or not data.battery_power:
+            # Idle, or unclear: nothing to extrapolate
+            self._charging = None
+            self._fit.reset()
+            return
+        if charging != self._charging:
+            self._charging = charging
+            self._fit.reset()
+
+        now = data.fetched_at.timestamp()
+        self._fit.add(now, data.battery_status)
+        if (
+            self._fit.count < BATTERY_FIT_MIN_SAMPLES
+            or self._fit.span < BATTERY_FIT_MIN_SPAN
+            or (slope := self._fit.slope) is None
+            or (level := self._fit.value_at(now)) is None
+        ):
+            return
+        if charging and slope > 0:
+            self.time_to_full = round(max(0.0, 100 - level) / slope / 60)
+        elif not charging and slope < 0:
+            self.time_to_reserve = round(max(0.0, level - self.reserve) / -slope / 60)
@@ -0,0 +1,129 @@
+"""Platform for binary sensor integration."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+    BinarySensorEntityDescription,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import STATE_ON, Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import RestoreEntity
+
+from .api import AtonSnapshot
+from .const import DOMAIN, GROUP_FLAGS
+from .coordinator import ApiCoordinator
+from .entity import ChangeAwareEntity, async_enabled_descriptions
+
+
+@dataclass
+class AtonBinarySensorEntityDescriptionMixin:
+    """Mixin for required keys."""
+
+    value_fn: Callable[[AtonSnapshot], bool]
+
+
+@dataclass
+class AtonBinarySensorEntityDescription(
+    BinarySensorEntityDescription, AtonBinarySensorEntityDescriptionMixin
+):
+    """Describes an Aton power-direction flag."""
+
+    device_class: BinarySensorDeviceClass | None = BinarySensorDeviceClass.POWER
+    group: str | None = GROUP_FLAGS
+
+
+BINARY_SENSORS: tuple[AtonBinarySensorEntityDescription, ...] = (
+    AtonBinarySensorEntityDescription(
+        key="grid_house",
+        name="Da Rete a Casa",
+        value_fn=lambda data: data.is_grid_to_house,
+    ),
+    AtonBinarySensorEntityDescription(
+        key="solar_battery",
+        name="Da Pannelli a Batteria",
+        value_fn=lambda data: data.is_solar_to_battery,
+    ),
+    AtonBinarySensorEntityDescription(
+        key="solar_grid",
+        name="Da Pannelli a Rete",
+        value_fn=lambda data: data.is_solar_to_grid,
+    ),
+    AtonBinarySensorEntityDescription(
+        key="battery_house",
+        name="Da Batteria a Casa",
+        value_fn=lambda data: data.is_battery_to_house,
+    ),
+    AtonBinarySensorEntityDescription(
+        key="solar_house",
+        name="Da Pannelli a Casa",
+        value_fn=lambda data: data.is_solar_to_house,
+    ),
+    AtonBinarySensorEntityDescription(
+        key="grid_battery",
+        name="Da Rete a Batteria",
+        value_fn=lambda data: data.is_grid_to_battery,
+    ),
+    AtonBinarySensorEntityDescription(
+        key="battery_grid",
+        name="Da Batteria a Rete",
+        value_fn=lambda data: data.is_battery_to_grid,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config: ConfigEntry,
+    add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the binary sensor platform."""
+    coordinator: ApiCoordinator = hass.data[DOMAIN][config.entry_id]
+
+    # Earlier versions registered the flags through the sensor platform: drop
+    # those registry entries so the binary sensors can take their unique ids.
+    ent_reg = er.async_get(hass)
+    for description in BINARY_SENSORS:
+        unique_id = f"aton_{description.key}_{coordinator.api.username}"
+        if entity_id := ent_reg.async_get_entity_id(Platform.SENSOR, DOMAIN, unique_id):
+            ent_reg.async_remove(entity_id)
+
+    add_entities(
+        [
+            AtonBinarySensor(coordinator, description)
+            for description in async_enabled_descriptions(
+                hass, coordinator, Platform.BINARY_SENSOR, BINARY_SENSORS
+            )
+        ],
+        update_before_add=False,
+    )
+
+
+class AtonBinarySensor(BinarySensorEntity, RestoreEntity, ChangeAwareEntity):
+    """Binary sensor driven by an AtonBinarySensorEntityDescription."""
+
+    entity_description: AtonBinarySensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: ApiCoordinator,
+        description: AtonBinarySensorEntityDescription,
+    ) -> None:
+        super().__init__(coordinator, description.key, description.name)
+        self.entity_description = description
+
+    def update(self) -> None:
+        self._attr_is_on = self.entity_description.value_fn(self.coordinator.data)
+
+    def _state_value(self) -> bool | None:
+        return self._attr_is_on
+
+    async def async_restore_last_state(self) -> None:
+        if (last := await self.async_get_last_state()) is not None:
+            self._attr_is_on = last.state == STATE_ON
@@ -7,12 +7,43 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, selector
 
-from .const import DOMAIN
-from pyaton import AtonAPI
+from .api import AtonAPI, CommunicationFailed
+from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_ARCHIVE,
+    CONF_ARCHIVE_DAYS,
+    CONF_ARERA_BUY_PRICES,
+    CONF_ARERA_SELL_PRICES,
+    CONF_BATTERY_RESERVE,
+    CONF_ENTITY_GROUPS,
+    CONF_MAX_INTERVAL,
+    CONF_MIN_INTERVAL,
+    CONF_POLL_INTERVAL,
+    CONF_POWER_DEADBAND,
+    CONF_POWER_DEADBAND_PERCENT,
+    CONF_RELAY_SERVE,
+    CONF_RELAY_TOKEN,
+    CONF_RELAY_URL,
+    CONF_REQUEST_TIMEOUT,
+    CONF_SNAPSHOT_EVENT,
+    CONF_THROTTLE_POWER_WRITES,
+    DEFAULT_ARCHIVE_DAYS,
+    DEFAULT_BATTERY_RESERVE,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_POWER_DEADBAND,
+    DEFAULT_POWER_DEADBAND_PERCENT,
+    DEFAULT_REQUEST_TIMEOUT,
+    DOMAIN,
+    ENTITY_GROUPS,
+)
+from .transport import async_get_transport
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,10 +61,11 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
 
-    api = await hass.async_add_executor_job(AtonAPI)
-    res = await hass.async_add_executor_job(
-        api.authenticate, data["username"], data["password"]
-    )
+    api = AtonAPI(async_get_transport(hass))
+    try:
+        res = await api.authenticate(data["username"], data["password"])
+    except CommunicationFailed as err:
+        raise CannotConnect from err
     if not res:
         raise InvalidAuth
 
@@ -42,10 +74,98 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
         "sn": api.sn,
         "id_impianto": api.id_impianto,
         "username": api.username,
+        "password": data["password"],
         "cookies": dict(api.cookies),
+        "cookies_expire": api.cookies_expire,
     }
 
 
+def _options_schema(options: dict[str, Any]) -> vol.Schema:
+    """Return the options form, filled in with the current options."""
+    return vol.Schema(
+        {
+            vol.Required(
+                CONF_ENTITY_GROUPS,
+                default=list(options.get(CONF_ENTITY_GROUPS, ENTITY_GROUPS)),
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=list(ENTITY_GROUPS),
+                    multiple=True,
+                    translation_key=CONF_ENTITY_GROUPS,
+                )
+            ),
+            vol.Required(
+                CONF_POLL_INTERVAL,
+                default=options.get(CONF_POLL_INTERVAL, DEFAULT_POLL_INTERVAL),
+            ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+            vol.Required(
+                CONF_ADAPTIVE_POLLING,
+                default=options.get(CONF_ADAPTIVE_POLLING, False),
+            ): bool,
+            vol.Required(
+                CONF_MIN_INTERVAL,
+                default=options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+            ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+            vol.Required(
+                CONF_MAX_INTERVAL,
+                default=options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL),
+            ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+            vol.Required(
+                CONF_REQUEST_TIMEOUT,
+                default=options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=120)),
+            vol.Required(
+                CONF_POWER_DEADBAND,
+                default=options.get(CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+            vol.Required(
+                CONF_POWER_DEADBAND_PERCENT,
+                default=options.get(
+                    CONF_POWER_DEADBAND_PERCENT, DEFAULT_POWER_DEADBAND_PERCENT
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+            vol.Required(
+                CONF_BATTERY_RESERVE,
+                default=options.get(CONF_BATTERY_RESERVE, DEFAULT_BATTERY_RESERVE),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
+            # Prices per kWh of the ARERA F1, F2 and F3 bands, 0 when not priced
+            **{
+                vol.Required(key, default=options.get(key, 0.0)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)
+                )
+                for key in (*CONF_ARERA_BUY_PRICES, *CONF_ARERA_SELL_PRICES)
+            },
+            vol.Required(
+                CONF_SNAPSHOT_EVENT, default=options.get(CONF_SNAPSHOT_EVENT, False)
+            ): bool,
+            vol.Required(
+                CONF_THROTTLE_POWER_WRITES,
+                default=options.get(CONF_THROTTLE_POWER_WRITES, False),
+            ): bool,
+            vol.Required(CONF_ARCHIVE, default=options.get(CONF_ARCHIVE, False)): bool,
+            vol.Required(
+                CONF_ARCHIVE_DAYS,
+                default=options.get(CONF_ARCHIVE_DAYS, DEFAULT_ARCHIVE_DAYS),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+            vol.Required(
+                CONF_RELAY_SERVE, default=options.get(CONF_RELAY_SERVE, False)
+            ): bool,
+            vol.Optional(
+                CONF_RELAY_URL,
+                description={"suggested_value": options.get(CONF_RELAY_URL)},
+            ): selector.TextSelector(
+                selector.TextSelectorConfig(type=selector.TextSelectorType.URL)
+            ),
+            vol.Optional(
+                CONF_RELAY_TOKEN,
+                description={"suggested_value": options.get(CONF_RELAY_TOKEN)},
+            ): selector.TextSelector(
+                selector.TextSelectorConfig(type=selector.TextSelectorType.PASSWORD)
+            ),
+        }
+    )
+
+
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Aton Storage."""
 
@@ -55,6 +175,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         super().__init__()
         self.reauth_entry = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Create the options flow."""
+        return OptionsFlowHandler()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -76,6 +204,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             _LOGGER.exception("Unexpected exception")
             errors["base"] = "unknown"
         else:
+            await self.async_set_unique_id(info["sn"])
+            self._abort_if_unique_id_configured()
             return self.async_create_entry(
                 title="Aton Storage " + info["username"], data=info
             )
@@ -136,6 +266,35 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the options of an Aton Storage plant."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        errors = {}
+        if user_input is not None:
+            if user_input[CONF_MIN_INTERVAL] > user_input[CONF_MAX_INTERVAL]:
+                errors["base"] = "invalid_interval"
+            if url := user_input.get(CONF_RELAY_URL):
+                try:
+                    cv.url(url)
+                except vol.Invalid:
+                    errors[CONF_RELAY_URL] = "invalid_url"
+                if not user_input.get(CONF_RELAY_TOKEN):
+                    errors[CONF_RELAY_TOKEN] = "relay_token_required"
+            if not errors:
+                # The entry reloads with the new options
+                return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=_options_schema(user_input or dict(self.config_entry.options)),
+            errors=errors,
+        )
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -1,3 +1,136 @@
 """Constants for the Aton Storage integration."""
 
 DOMAIN = "aton_storage"
+
+CONF_ENTITY_GROUPS = "entity_groups"
+CONF_POLL_INTERVAL = "poll_interval"
+
+# Groups of entities that can be turned off, and of the snapshot fields
+# parsed for them
+GROUP_POWER = "power"
+GROUP_FLAGS = "flags"
+GROUP_ENERGY = "energy"
+GROUP_SELF_SUFFICIENCY = "self_sufficiency"
+ENTITY_GROUPS = (GROUP_POWER, GROUP_FLAGS, GROUP_ENERGY, GROUP_SELF_SUFFICIENCY)
+# Set up when the energy prices are configured, rather than toggled
+GROUP_COST = "cost"
+
+# Seconds between two polls, unless adaptive polling is on
+DEFAULT_POLL_INTERVAL = 30
+
+CONF_POWER_DEADBAND = "power_deadband"
+CONF_POWER_DEADBAND_PERCENT = "power_deadband_percent"
+
+# Power changes at or below these thresholds don't produce a state write.
+# Zero only suppresses writes of identical values.
+DEFAULT_POWER_DEADBAND = 0
+DEFAULT_POWER_DEADBAND_PERCENT = 0
+
+# Plants polled at the same time across all the config entries
+MAX_CONCURRENT_POLLS = 8
+# Minimum seconds between two polls made with the same account
+ACCOUNT_MIN_SPACING = 1.0
+
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MIN_INTERVAL = "min_interval"
+CONF_MAX_INTERVAL = "max_interval"
+
+# Bounds, in seconds, of the adaptive poll interval
+DEFAULT_MIN_INTERVAL = 10
+DEFAULT_MAX_INTERVAL = 300
+
+# Seconds before the cookies expire at which the session is renewed
+SESSION_REFRESH_MARGIN = 300
+
+# Seconds over which the first poll of every plant is spread at startup
+STARTUP_SPREAD = 5.0
+# Seconds async_setup_entry may take before a warning is logged
+SETUP_TIME_BUDGET = 0.5
+
+# Seconds within which a refresh service call reuses the last poll of a plant
+# instead of calling the cloud again
+REFRESH_MIN_SPACING = 10
+
+# Snapshots kept by the coordinator
+SNAPSHOT_HISTORY = 20
+
+CONF_REQUEST_TIMEOUT = "request_timeout"
+
+# Seconds before a single request to the cloud is abandoned
+DEFAULT_REQUEST_TIMEOUT = 15
+# Attempts per poll, and bounds in seconds of the backoff between them
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 30.0
+# Failed polls in a row after which requests are paused, and for how long
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_RESET_TIMEOUT = 300
+
+# Poll timings kept for the diagnostics
+POLL_TIMINGS_KEPT = 50
+
+# Seconds between two snapshots above which the local energy counters don't
+# integrate the power, and leave the gap to the cloud counters
+FLOW_ENERGY_MAX_GAP = 900
+# Seconds the local energy counters may go unsaved
+FLOW_ENERGY_SAVE_DELAY = 60
+
+# Seconds covered by the rolling power statistics
+ROLLING_WINDOWS = (60, 900, 3600)
+
+CONF_BATTERY_RESERVE = "battery_reserve"
+
+# Battery percentage the time to reserve is computed for
+DEFAULT_BATTERY_RESERVE = 10
+# Seconds of battery percentages fitted by the charge time estimates, and
+# samples and seconds they need before estimating anything
+BATTERY_FIT_WINDOW = 1800
+BATTERY_FIT_MIN_SAMPLES = 3
+BATTERY_FIT_MIN_SPAN = 120
+
+CONF_RELAY_SERVE = "relay_serve"
+CONF_RELAY_URL = "relay_url"
+CONF_RELAY_TOKEN = "relay_token"
+
+# Relay servers by serial number, defined here so the relay module (and the
+# HTTP server) is only imported when a relay is configured
+DATA_RELAY = f"{DOMAIN}_relay"
+
+# Seconds a follower waits for the next snapshot of the relay, and the most
+# the relay lets it wait
+RELAY_LONG_POLL = 50
+RELAY_MAX_WAIT = 60
+
+CONF_ARCHIVE = "archive"
+CONF_ARCHIVE_DAYS = "archive_days"
+
+# Days of raw payloads kept in the archive, 0 to keep them all
+DEFAULT_ARCHIVE_DAYS = 30
+# Payloads buffered before they are written, and the most seconds they wait
+ARCHIVE_BATCH_SIZE = 60
+ARCHIVE_FLUSH_DELAY = 300
+
+CONF_SNAPSHOT_EVENT = "snapshot_event"
+CONF_THROTTLE_POWER_WRITES = "throttle_power_writes"
+
+# Fired with the whole snapshot after every poll, if enabled
+EVENT_SNAPSHOT = f"{DOMAIN}_snapshot"
+# Seconds between two state writes of a power sensor when they are throttled
+THROTTLED_WRITE_INTERVAL = 300
+
+# Buy and sell prices per kWh of the Italian ARERA F1, F2 and F3 bands, the
+# only time-of-use schedule supported; the cost sensors are set up once any
+# of them is set
+CONF_ARERA_BUY_PRICES = (
+    "arera_buy_price_f1",
+    "arera_buy_price_f2",
+    "arera_buy_price_f3",
+)
+CONF_ARERA_SELL_PRICES = (
+    "arera_sell_price_f1",
+    "arera_sell_price_f2",
+    "arera_sell_price_f3",
+)
+
+# Seconds the cost totals may go unsaved
+COST_SAVE_DELAY = 60
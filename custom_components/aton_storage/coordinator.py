@@ -0,0 +1,402 @@
+"""Data update coordinator for the Aton Storage integration."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from datetime import timedelta
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+from homeassistant.util import dt as dt_util
+
+from .adaptive import AdaptiveInterval
+from .api import AtonAPI, AtonSnapshot, CommunicationFailed, NoAuth
+from .auth import AtonSessionManager
+from .battery import BatteryEstimator
+from .const import (
+    BATTERY_FIT_WINDOW,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_TIMEOUT,
+    CONF_ADAPTIVE_POLLING,
+    CONF_ARERA_BUY_PRICES,
+    CONF_ARERA_SELL_PRICES,
+    CONF_BATTERY_RESERVE,
+    CONF_ENTITY_GROUPS,
+    CONF_MAX_INTERVAL,
+    CONF_MIN_INTERVAL,
+    CONF_POLL_INTERVAL,
+    CONF_POWER_DEADBAND,
+    CONF_POWER_DEADBAND_PERCENT,
+    CONF_REQUEST_TIMEOUT,
+    CONF_SNAPSHOT_EVENT,
+    CONF_THROTTLE_POWER_WRITES,
+    DEFAULT_BATTERY_RESERVE,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_POWER_DEADBAND,
+    DEFAULT_POWER_DEADBAND_PERCENT,
+    DEFAULT_REQUEST_TIMEOUT,
+    DOMAIN,
+    ENTITY_GROUPS,
+    EVENT_SNAPSHOT,
+    GROUP_COST,
+    GROUP_ENERGY,
+    GROUP_FLAGS,
+    GROUP_POWER,
+    POLL_TIMINGS_KEPT,
+    REFRESH_MIN_SPACING,
+    RELAY_LONG_POLL,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    SNAPSHOT_HISTORY,
+    THROTTLED_WRITE_INTERVAL,
+)
+from .energy import FlowEnergyIntegrator
+from .resilience import BreakerState, CircuitBreaker, backoff_delay
+from .rolling import RollingStats
+from .scheduler import AtonPollScheduler
+from .stats import PollStats, PollTiming
+
+if TYPE_CHECKING:
+    from .archive import AtonArchive
+    from .relay import AtonRelayClient, AtonRelayServer
+    from .tariff import CostTracker
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ApiCoordinator(DataUpdateCoordinator[AtonSnapshot]):
+    """Coordinates the polls of a single Aton plant."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        api: AtonAPI,
+        scheduler: AtonPollScheduler,
+    ) -> None:
+        """Initialize my coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            # Name of the data. For logging purposes.
+            name=f"Aton Storage {api.username}",
+            # Polls are driven by the shared scheduler, not by the coordinator.
+            update_interval=None,
+        )
+        self.api = api
+        self.scheduler = scheduler
+        self.session = AtonSessionManager(hass, entry, api)
+        api.request_timeout = entry.options.get(
+            CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT
+        )
+        self.breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+        self.device_info = DeviceInfo(
+            identifiers={(DOMAIN, "aton_storage_" + api.username)},
+            name=f"Fotovoltaico {api.username}",
+            manufacturer="Aton Green Storage",
+        )
+        # Options the entry was set up with, to reload it when they change
+        self.options = dict(entry.options)
+        self.poll_interval = timedelta(
+            seconds=entry.options.get(CONF_POLL_INTERVAL, DEFAULT_POLL_INTERVAL)
+        )
+        self.adaptive: AdaptiveInterval | None = None
+        if entry.options.get(CONF_ADAPTIVE_POLLING, False):
+            self.adaptive = AdaptiveInterval(
+                timedelta(
+                    seconds=entry.options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL)
+                ),
+                timedelta(
+                    seconds=entry.options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL)
+                ),
+                self.poll_interval,
+            )
+        # Entity groups to set up; the API only parses what they, and the
+        # estimates computed here, read from the payload
+        self.groups = frozenset(entry.options.get(CONF_ENTITY_GROUPS, ENTITY_GROUPS))
+        buy = tuple(float(entry.options.get(key, 0)) for key in CONF_ARERA_BUY_PRICES)
+        sell = tuple(float(entry.options.get(key, 0)) for key in CONF_ARERA_SELL_PRICES)
+        self.cost: CostTracker | None = None
+        if any(buy) or any(sell):
+            from . import tariff  # pylint: disable=import-outside-toplevel
+
+            self.cost = tariff.CostTracker(
+                hass, entry.entry_id, tariff.TariffSchedule(buy, sell)
+            )
+            self.groups |= {GROUP_COST}
+        parsed = set(self.groups)
+        if self.cost is not None:
+            # Priced from the cloud energy counters
+            parsed.add(GROUP_ENERGY)
+        if GROUP_ENERGY in self.groups:
+            # The flow energy counters split the powers by direction
+            parsed |= {GROUP_POWER, GROUP_FLAGS}
+        if GROUP_POWER in self.groups:
+            # The battery estimates follow the direction of the flows
+            parsed.add(GROUP_FLAGS)
+        if self.adaptive is not None:
+            parsed |= {GROUP_POWER, GROUP_FLAGS}
+        api.groups = frozenset(parsed)
+        self.power_deadband = entry.options.get(
+            CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND
+        )
+        self.power_deadband_percent = entry.options.get(
+            CONF_POWER_DEADBAND_PERCENT, DEFAULT_POWER_DEADBAND_PERCENT
+        )
+        # Bulk consumers read the snapshot event: the power sensors, which
+        # change at every poll, can then write their state less often.
+        self.snapshot_event = entry.options.get(CONF_SNAPSHOT_EVENT, False)
+        self.power_write_interval: float | None = (
+            THROTTLED_WRITE_INTERVAL
+            if self.snapshot_event
+            and entry.options.get(CONF_THROTTLE_POWER_WRITES, False)
+            else None
+        )
+        # Most recent snapshots, newest last, for the diagnostics
+        self.history: deque[AtonSnapshot] = deque(maxlen=SNAPSHOT_HISTORY)
+        self.flow_energy = FlowEnergyIntegrator(hass, entry.entry_id)
+        # Sized for the fastest pace the plant can be polled at
+        fastest = self.adaptive.min_interval if self.adaptive else self.poll_interval
+        self.rolling = RollingStats(fastest.total_seconds())
+        self.battery = BatteryEstimator(
+            BATTERY_FIT_WINDOW,
+            entry.options.get(CONF_BATTERY_RESERVE, DEFAULT_BATTERY_RESERVE),
+        )
+        self.stats = PollStats(POLL_TIMINGS_KEPT)
+        self._poll_wait = 0.0
+        # Seconds taken by async_setup_entry
+        self.setup_time: float | None = None
+        # State writes performed and suppressed by ChangeAwareEntity
+        self.state_writes = 0
+        self.skipped_writes = 0
+        # Refresh in flight, shared by the scheduler and the refresh service
+        self._refresh_task: asyncio.Task | None = None
+        self._last_refresh: float | None = None
+        # Set up by async_setup_entry from the relay options: the relay of
+        # another instance this plant is read from, and the one serving it
+        self.relay: AtonRelayClient | None = None
+        self.relay_server: AtonRelayServer | None = None
+        # Set up by async_setup_entry if the raw payloads are archived
+        self.archive: AtonArchive | None = None
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all listeners and log how many state writes were saved."""
+        writes, skipped = self.state_writes, self.skipped_writes
+        super().async_update_listeners()
+        self.stats.last_writes_per_poll = self.state_writes - writes
+        _LOGGER.debug(
+            "%s: %d state writes, %d skipped (%d skipped in total)",
+            self.api.username,
+            self.state_writes - writes,
+            self.skipped_writes - skipped,
+            self.skipped_writes,
+        )
+
+    async def async_refresh_coalesced(self) -> None:
+        """Refresh the data, or wait for the refresh already in flight."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._last_refresh = time.monotonic()
+            self._refresh_task = self.hass.async_create_task(
+                self.async_refresh(), f"{self.name} refresh"
+            )
+        # A caller giving up doesn't cancel the refresh the others wait for
+        await asyncio.shield(self._refresh_task)
+
+    async def async_refresh_on_demand(self) -> None:
+        """Refresh the data for a service call.
+
+        Calls coming within REFRESH_MIN_SPACING seconds of the last refresh
+        get its data instead of calling the cloud again.
+        """
+        in_flight = self._refresh_task is not None and not self._refresh_task.done()
+        if (
+            not in_flight
+            and self._last_refresh is not None
+            and time.monotonic() - self._last_refresh < REFRESH_MIN_SPACING
+        ):
+            return
+        await self.async_refresh_coalesced()
+
+    async def async_request_refresh(self) -> None:
+        """Refresh the data for homeassistant.update_entity.
+
+        Goes through the same coalescing and spacing as the refresh service,
+        instead of the debounced refresh of the base class.
+        """
+        await self.async_refresh_on_demand()
+
+    async def _async_update_data(self) -> AtonSnapshot:
+        """Fetch data from API endpoint.
+
+        This is the place to pre-process the data to lookup tables
+        so entities can quickly look up their data.
+        """
+        started = dt_util.utcnow()
+        begin = time.monotonic()
+        self._poll_wait = 0.0
+        success = False
+        try:
+            snapshot = await self._async_update_snapshot()
+            success = True
+        finally:
+            self.stats.record(
+                PollTiming(
+                    started=started,
+                    wait=self._poll_wait,
+                    network=time.monotonic() - begin - self._poll_wait,
+                    payload_size=self.api.last_payload_size if success else None,
+                    success=success,
+                )
+            )
+
+        self._record(snapshot)
+        return snapshot
+
+    def _record(self, snapshot: AtonSnapshot) -> None:
+        """Feed a new snapshot to the estimates and to the relay."""
+        self.history.append(snapshot)
+        if GROUP_ENERGY in self.groups:
+            self.flow_energy.update(snapshot)
+        if GROUP_POWER in self.groups:
+            self.rolling.update(snapshot)
+            self.battery.update(snapshot)
+        if self.cost is not None:
+            self.cost.update(snapshot)
+        if self.adaptive is not None:
+            interval = self.adaptive.update(snapshot)
+            if interval != self.poll_interval:
+                _LOGGER.debug("%s: polling every %s", self.api.username, interval)
+            self.poll_interval = interval
+        if self.snapshot_event:
+            self.hass.bus.async_fire(
+                EVENT_SNAPSHOT,
+                {
+                    "config_entry_id": self.config_entry.entry_id,
+                    "username": self.api.username,
+                    **snapshot.as_dict(),
+                },
+            )
+        if (payload := self.api.last_payload) is not None:
+            if self.relay_server is not None:
+                self.relay_server.publish(snapshot.fetched_at, payload)
+            if self.archive is not None:
+                self.archive.append(snapshot.fetched_at, payload)
+
+    async def async_follow_relay(self) -> None:
+        """Receive every snapshot of the relay as soon as it is published."""
+        assert self.relay is not None
+        attempt = 0
+        while True:
+            try:
+                snapshot = await self.relay.async_wait_next(self.api, RELAY_LONG_POLL)
+            except (CommunicationFailed, asyncio.TimeoutError) as err:
+                self.async_set_update_error(UpdateFailed(f"Error reading relay: {err}"))
+                delay = backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            attempt = 0
+            if snapshot is None or (
+                self.data is not None and snapshot.fetched_at <= self.data.fetched_at
+            ):
+                continue
+            self._record(snapshot)
+            self.async_set_updated_data(snapshot)
+
+    async def _async_update_snapshot(self) -> AtonSnapshot:
+        """Fetch a snapshot unless the circuit breaker is open."""
+        if not self.breaker.allow_request():
+            raise UpdateFailed("Aton cloud unreachable, waiting before retrying")
+        try:
+            snapshot = await self._async_fetch_with_retries()
+        except NoAuth as err:
+            # The cloud answered, it's the session that is gone
+            self._record_breaker(success=True)
+            # Raising ConfigEntryAuthFailed will cancel future updates
+            # and start a config flow with SOURCE_REAUTH (async_step_reauth)
+            raise ConfigEntryAuthFailed(err) from err
+        except (CommunicationFailed, asyncio.TimeoutError) as err:
+            self._record_breaker(success=False)
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+        self._record_breaker(success=True)
+        return snapshot
+
+    async def _async_fetch_with_retries(self) -> AtonSnapshot:
+        """Fetch a snapshot, retrying with exponential backoff and jitter."""
+        attempt = 0
+        while True:
+            try:
+                waiting = time.monotonic()
+                async with self.scheduler.async_slot(self.api.username):
+                    self._poll_wait += time.monotonic() - waiting
+                    # An attempt may have to log in and then send two requests
+                    async with asyncio.timeout(3 * self.api.request_timeout):
+                        return await self._async_fetch()
+            except (CommunicationFailed, asyncio.TimeoutError) as err:
+                attempt += 1
+                if attempt == RETRY_ATTEMPTS:
+                    raise
+                delay = backoff_delay(attempt - 1, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+                _LOGGER.debug(
+                    "%s: attempt %d failed (%s), retrying in %.1f seconds",
+                    self.api.username,
+                    attempt,
+                    err or type(err).__name__,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+
+    def _record_breaker(self, success: bool) -> None:
+        was_available = self.breaker.state is BreakerState.CLOSED
+        if success:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+            # The coordinator only notifies listeners on the first failure:
+            # keep the failure counters and the availability up to date.
+            self.hass.loop.call_soon(self.async_update_listeners)
+        available = self.breaker.state is BreakerState.CLOSED
+        if was_available and not available:
+            _LOGGER.warning(
+                "%s: Aton cloud failed %d times in a row, pausing requests for %d"
+                " seconds",
+                self.api.username,
+                self.breaker.failures,
+                self.breaker.reset_timeout,
+            )
+        elif available and not was_available:
+            _LOGGER.info("%s: Aton cloud reachable again", self.api.username)
+
+    @property
+    def available(self) -> bool:
+        """Return True if the entities of this plant should be available."""
+        if self.relay is not None:
+            return self.last_update_success
+        return self.breaker.state is BreakerState.CLOSED and not isinstance(
+            self.last_exception, ConfigEntryAuthFailed
+        )
+
+    async def _async_fetch(self) -> AtonSnapshot:
+        """Fetch a snapshot, renewing the session if it expired."""
+        if self.relay is not None:
+            return await self.relay.async_fetch(self.api)
+        await self.session.async_ensure_valid()
+        generation = self.session.generation
+        try:
+            return await self.api.fetch_data()
+        except NoAuth:
+            await self.session.async_renew(generation)
+            return await self.api.fetch_data()
@@ -0,0 +1,55 @@
+"""Diagnostics support for the Aton Storage integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import ApiCoordinator
+
+TO_REDACT = {
+    "password",
+    "cookies",
+    "username",
+    "sn",
+    "id_impianto",
+    "idImpianto",
+    "unique_id",
+    "title",
+    "relay_url",
+    "relay_token",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: ApiCoordinator = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "setup_time": coordinator.setup_time,
+        "poll_interval": coordinator.poll_interval.total_seconds(),
+        "breaker": {
+            "state": coordinator.breaker.state,
+            "failures": coordinator.breaker.failures,
+        },
+        "auth_refreshes": coordinator.session.refresh_count,
+        "relay": {
+            "following": coordinator.relay is not None,
+            "serving": coordinator.relay_server is not None,
+        },
+        "state_writes": coordinator.state_writes,
+        "skipped_writes": coordinator.skipped_writes,
+        "stats": coordinator.stats.as_dict(),
+        "recent_snapshots": [
+            async_redact_data(snapshot.as_dict(), TO_REDACT)
+            for snapshot in coordinator.history
+        ],
+        "last_payload": async_redact_data(
+            coordinator.api.last_payload or {}, TO_REDACT
+        ),
+    }
@@ -0,0 +1,186 @@
+"""Local energy counters integrated from the power snapshots."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .api import AtonSnapshot
+from .const import DOMAIN, FLOW_ENERGY_MAX_GAP, FLOW_ENERGY_SAVE_DELAY
+
+STORAGE_VERSION = 1
+
+# Power flows, named like the direction binary sensors
+FLOWS = (
+    "grid_house",
+    "solar_battery",
+    "solar_grid",
+    "battery_house",
+    "solar_house",
+    "grid_battery",
+    "battery_grid",
+)
+(
+    GRID_HOUSE,
+    SOLAR_BATTERY,
+    SOLAR_GRID,
+    BATTERY_HOUSE,
+    SOLAR_HOUSE,
+    GRID_BATTERY,
+    BATTERY_GRID,
+) = range(len(FLOWS))
+
+# Cloud counters the flows are reconciled against: the snapshot field, the
+# flows it measures, and the flows that absorb the drift. Every flow absorbs
+# the drift of exactly one counter.
+RECONCILED = (
+    ("sold_energy", (SOLAR_GRID, BATTERY_GRID), (SOLAR_GRID, BATTERY_GRID)),
+    ("bought_energy", (GRID_HOUSE, GRID_BATTERY), (GRID_HOUSE, GRID_BATTERY)),
+    (
+        "self_consumed_energy",
+        (SOLAR_HOUSE, BATTERY_HOUSE),
+        (SOLAR_HOUSE, BATTERY_HOUSE),
+    ),
+    ("solar_energy", (SOLAR_HOUSE, SOLAR_BATTERY, SOLAR_GRID), (SOLAR_BATTERY,)),
+)
+
+# For each flow, the (counter, position) pairs that measure it
+_MEASURED_BY: tuple[tuple[tuple[int, int], ...], ...] = tuple(
+    tuple(
+        (counter, measured.index(flow))
+        for counter, (_, measured, _) in enumerate(RECONCILED)
+        if flow in measured
+    )
+    for flow in range(len(FLOWS))
+)
+
+
+def flow_powers(data: AtonSnapshot) -> list[float]:
+    """Split the powers of a snapshot into the flows between the devices.
+
+    Uses the magnitudes of the powers and the direction flags, so it doesn't
+    depend on the sign conventions of the cloud. The house is served by the
+    panels first and then by the battery, and the panels serve the house
+    first, then the battery, then the grid.
+    """
+    solar = abs(data.solar_production)
+    house = abs(data.house_consumption)
+    battery = abs(data.battery_power)
+    flows = [0.0] * len(FLOWS)
+
+    if data.is_solar_to_house:
+        flows[SOLAR_HOUSE] = min(solar, house)
+    if data.is_battery_to_house or data.is_battery_to_grid:
+        if data.is_battery_to_house:
+            flows[BATTERY_HOUSE] = min(battery, house - flows[SOLAR_HOUSE])
+        if data.is_battery_to_grid:
+            flows[BATTERY_GRID] = battery - flows[BATTERY_HOUSE]
+    else:
+        if data.is_solar_to_battery:
+            flows[SOLAR_BATTERY] = min(battery, solar - flows[SOLAR_HOUSE])
+        if data.is_grid_to_battery:
+            flows[GRID_BATTERY] = battery - flows[SOLAR_BATTERY]
+    if data.is_grid_to_house:
+        flows[GRID_HOUSE] = max(0.0, house - flows[SOLAR_HOUSE] - flows[BATTERY_HOUSE])
+    if data.is_solar_to_grid:
+        flows[SOLAR_GRID] = max(0.0, solar - flows[SOLAR_HOUSE] - flows[SOLAR_BATTERY])
+    return flows
+
+
+class FlowEnergyIntegrator:
+    """Integrates the energy of every flow with the trapezoidal rule.
+
+    Each snapshot adds the area under the power of every flow since the
+    previous one, in constant time. When a cloud energy counter steps, the
+    energy integrated since its previous step is compared with the step, and
+    the difference is spread over the flows it covers in proportion to their
+    share. The counters never decrease: an overshoot becomes a debt that
+    absorbs the following increments. The state is saved in .storage.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.flow_energy.{entry_id}"
+        )
+        # Integrated energy of each flow, in Wh
+        self.values = [0.0] * len(FLOWS)
+        self._debt = [0.0] * len(FLOWS)
+        # Last value of each cloud counter, and the energy integrated since
+        self._cloud: list[int | None] = [None] * len(RECONCILED)
+        self._since = [[0.0] * len(measured) for _, measured, _ in RECONCILED]
+        self._last_time: float | None = None
+        self._last_powers: list[float] | None = None
+
+    def value(self, flow: str) -> float:
+        """Return the energy of a flow, in Wh."""
+        return self.values[FLOWS.index(flow)]
+
+    async def async_load(self) -> None:
+        """Restore the counters saved before the last shutdown."""
+        if (data := await self._store.async_load()) is None:
+            return
+        self.values = data["values"]
+        self._debt = data["debt"]
+        self._cloud = data["cloud"]
+        self._since = data["since"]
+
+    async def async_save(self) -> None:
+        """Save the counters now."""
+        await self._store.async_save(self._data_to_save())
+
+    def update(self, data: AtonSnapshot) -> None:
+        """Integrate the powers of a new snapshot and reconcile the drift."""
+        now = data.fetched_at.timestamp()
+        powers = flow_powers(data)
+        if self._last_powers is not None and (
+            0 < (elapsed := now - self._last_time) <= FLOW_ENERGY_MAX_GAP
+        ):
+            # Longer gaps are left to the reconciliation with the cloud
+            hours = elapsed / 3600
+            for flow, (before, after) in enumerate(zip(self._last_powers, powers)):
+                if energy := (before + after) / 2 * hours:
+                    self._add(flow, energy)
+                    for counter, position in _MEASURED_BY[flow]:
+                        self._since[counter][position] += energy
+        self._last_time = now
+        self._last_powers = powers
+
+        for counter, (field, measured, absorbing) in enumerate(RECONCILED):
+            cloud = getattr(data, field)
+            last = self._cloud[counter]
+            self._cloud[counter] = cloud
+            if cloud == last:
+                continue
+            since = self._since[counter]
+            # The cloud counters restart from zero every day: the energy
+            # between their last step and the reset is unknown.
+            if last is not None and cloud > last:
+                self._reconcile(
+                    cloud - last - sum(since),
+                    [(flow, since[measured.index(flow)]) for flow in absorbing],
+                )
+            since[:] = [0.0] * len(since)
+
+        self._store.async_delay_save(self._data_to_save, FLOW_ENERGY_SAVE_DELAY)
+
+    def _reconcile(self, drift: float, shares: list[tuple[int, float]]) -> None:
+        total = sum(share for _, share in shares)
+        for flow, share in shares:
+            self._add(flow, drift * (share / total if total else 1 / len(shares)))
+
+    def _add(self, flow: int, energy: float) -> None:
+        if energy < 0:
+            self._debt[flow] -= energy
+            return
+        paid = min(self._debt[flow], energy)
+        self._debt[flow] -= paid
+        self.values[flow] += energy - paid
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "values": self.values,
+            "debt": self._debt,
+            "cloud": self._cloud,
+            "since": self._since,
+        }
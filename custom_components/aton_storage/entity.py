@@ -0,0 +1,105 @@
+"""Base entity for the Aton Storage integration."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+import time
+from typing import Protocol, TypeVar
+
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .coordinator import ApiCoordinator
+
+
+class _GroupedDescription(Protocol):
+    key: str
+    group: str | None
+
+
+_DescriptionT = TypeVar("_DescriptionT", bound=_GroupedDescription)
+
+
+@callback
+def async_enabled_descriptions(
+    hass: HomeAssistant,
+    coordinator: ApiCoordinator,
+    platform: Platform,
+    descriptions: Iterable[_DescriptionT],
+) -> list[_DescriptionT]:
+    """Return the descriptions of the enabled groups.
+
+    The registry entries of the disabled ones are removed, so the entities
+    go away instead of staying around unavailable.
+    """
+    ent_reg = er.async_get(hass)
+    enabled = []
+    for description in descriptions:
+        if description.group is None or description.group in coordinator.groups:
+            enabled.append(description)
+            continue
+        unique_id = f"aton_{description.key}_{coordinator.api.username}"
+        if entity_id := ent_reg.async_get_entity_id(platform, DOMAIN, unique_id):
+            ent_reg.async_remove(entity_id)
+    return enabled
+
+
+class ChangeAwareEntity(CoordinatorEntity[ApiCoordinator]):
+    """Coordinator entity that only writes its state when it changed."""
+
+    _last_written: tuple | None = None
+    # time.monotonic() of the last state write
+    _last_write_time: float = 0.0
+
+    def __init__(self, coordinator: ApiCoordinator, key: str, name: str) -> None:
+        super().__init__(coordinator)
+        username = coordinator.api.username
+        self._attr_name = f"{username} {name}"
+        self._attr_unique_id = f"aton_{key}_{username}"
+        self._attr_device_info = coordinator.device_info
+
+    @property
+    def available(self) -> bool:
+        """Return True while the cloud circuit breaker is closed."""
+        return self.coordinator.available
+
+    def update(self) -> None:
+        """update"""
+
+    def _state_value(self):
+        return self._attr_native_value
+
+    def _is_insignificant(self, old, new) -> bool:
+        """Return True if the change from old to new is not worth a write."""
+        return old == new
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the last known value until the first poll comes in."""
+        await super().async_added_to_hass()
+        if self.coordinator.data is None:
+            await self.async_restore_last_state()
+            self._last_written = (self.available, self._state_value())
+
+    async def async_restore_last_state(self) -> None:
+        """restore"""
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        if self.coordinator.data is not None:
+            self.update()
+        state = (self.available, self._state_value())
+        last = self._last_written
+        if (
+            last is not None
+            and last[0] == state[0]
+            and self._is_insignificant(last[1], state[1])
+        ):
+            self.coordinator.skipped_writes += 1
+            return
+        self._last_written = state
+        self._last_write_time = time.monotonic()
+        self.coordinator.state_writes += 1
+        self.async_write_ha_state()
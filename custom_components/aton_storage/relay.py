@@ -0,0 +1,167 @@
+"""Relay of the Aton snapshots between Home Assistant instances.
+
+An instance with the relay_serve option polls the cloud as usual and serves
+the last monitor payload of the plant at /api/aton_storage/relay/<sn>,
+through the Home Assistant HTTP server and its access tokens. Instances
+with the relay_url option read the plant from there instead of the cloud:
+they send the ETag of the payload they have and wait for the next one, so
+they get every poll as soon as it lands and the cloud sees a single client
+however many followers there are.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from http import HTTPStatus
+import secrets
+
+import aiohttp
+from aiohttp import hdrs, web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.json import json_bytes
+from homeassistant.util.json import json_loads
+
+from .api import AtonAPI, AtonSnapshot, CommunicationFailed
+from .const import DATA_RELAY, RELAY_MAX_WAIT
+
+RELAY_PATH = "/api/aton_storage/relay/{sn}"
+
+
+class AtonRelayServer:
+    """Last payload of a plant, as served to the followers.
+
+    The body is encoded once per poll, whatever the number of followers.
+    """
+
+    def __init__(self) -> None:
+        # Tells the ETags of a restarted leader apart from the previous ones
+        self._boot = secrets.token_hex(4)
+        self._version = 0
+        self.etag: str | None = None
+        self.body: bytes | None = None
+        self._changed = asyncio.Event()
+
+    @callback
+    def publish(self, fetched_at: datetime, payload: dict) -> None:
+        """Serve a new payload and wake up the followers waiting for it."""
+        self._version += 1
+        self.etag = f'"{self._boot}-{self._version}"'
+        self.body = json_bytes(
+            {"fetched_at": fetched_at.isoformat(), "payload": payload}
+        )
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def async_wait(self, etag: str | None, timeout: float) -> None:
+        """Wait up to timeout seconds for a payload other than etag."""
+        if self.etag != etag:
+            return
+        try:
+            async with asyncio.timeout(timeout):
+                await self._changed.wait()
+        except asyncio.TimeoutError:
+            pass
+
+
+@callback
+def async_get_relay_servers(hass: HomeAssistant) -> dict[str, AtonRelayServer]:
+    """Return the relay servers by serial number, registering the view once."""
+    if (servers := hass.data.get(DATA_RELAY)) is None:
+        servers = hass.data[DATA_RELAY] = {}
+        hass.http.register_view(AtonRelayView(servers))
+    return servers
+
+
+class AtonRelayView(HomeAssistantView):
+    """Serves the last payload of a plant, long-polling on its ETag."""
+
+    url = RELAY_PATH
+    name = "api:aton_storage:relay"
+
+    def __init__(self, servers: dict[str, AtonRelayServer]) -> None:
+        self._servers = servers
+
+    async def get(self, request: web.Request, sn: str) -> web.Response:
+        """Return the payload, or 304 if it didn't change within wait seconds."""
+        if (server := self._servers.get(sn)) is None:
+            return self.json_message("Unknown plant", HTTPStatus.NOT_FOUND)
+        etag = request.headers.get(hdrs.IF_NONE_MATCH)
+        try:
+            wait = min(float(request.query.get("wait", 0)), RELAY_MAX_WAIT)
+        except ValueError:
+            return self.json_message("Invalid wait", HTTPStatus.BAD_REQUEST)
+        if wait > 0:
+            await server.async_wait(etag, wait)
+        if server.body is None:
+            return self.json_message(
+                "No data from the cloud yet", HTTPStatus.SERVICE_UNAVAILABLE
+            )
+        if etag == server.etag:
+            return web.Response(
+                status=HTTPStatus.NOT_MODIFIED, headers={hdrs.ETAG: server.etag}
+            )
+        return web.Response(
+            body=server.body,
+            content_type="application/json",
+            headers={hdrs.ETAG: server.etag},
+        )
+
+
+class AtonRelayClient:
+    """Reads the snapshots of a plant from the relay of another instance."""
+
+    def __init__(
+        self, session: aiohttp.ClientSession, url: str, token: str, sn: str
+    ) -> None:
+        self._session = session
+        self.url = url.rstrip("/") + RELAY_PATH.format(sn=sn)
+        self._token = token
+        # ETag of the last payload received
+        self.etag: str | None = None
+
+    async def async_fetch(self, api: AtonAPI) -> AtonSnapshot:
+        """Return the last payload of the leader as a snapshot."""
+        snapshot = await self._async_get(api, 0)
+        assert snapshot is not None
+        return snapshot
+
+    async def async_wait_next(self, api: AtonAPI, wait: float) -> AtonSnapshot | None:
+        """Wait up to wait seconds for a payload newer than the last one.
+
+        Returns None if none came.
+        """
+        return await self._async_get(api, wait)
+
+    async def _async_get(self, api: AtonAPI, wait: float) -> AtonSnapshot | None:
+        headers = {hdrs.AUTHORIZATION: f"Bearer {self._token}"}
+        if wait and self.etag is not None:
+            headers[hdrs.IF_NONE_MATCH] = self.etag
+        try:
+            async with self._session.get(
+                self.url,
+                params={"wait": wait},
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=wait + api.request_timeout),
+            ) as resp:
+                if resp.status == HTTPStatus.NOT_MODIFIED:
+                    return None
+                if resp.status != HTTPStatus.OK:
+                    raise CommunicationFailed(f"Relay answered {resp.status}")
+                text = await resp.text()
+                etag = resp.headers.get(hdrs.ETAG)
+        except aiohttp.ClientError as err:
+            raise CommunicationFailed(f"Cannot reach the relay: {err}") from err
+
+        try:
+            data = json_loads(text)
+            snapshot = AtonSnapshot.from_payload(
+                data["payload"], datetime.fromisoformat(data["fetched_at"]), api.groups
+            )
+        except (ValueError, KeyError, TypeError) as err:
+            raise CommunicationFailed(f"Unexpected relay payload: {err}") from err
+        self.etag = etag
+        api.last_payload = data["payload"]
+        api.last_payload_size = len(text)
+        return snapshot
@@ -0,0 +1,72 @@
+"""Retry and circuit breaker helpers for the Aton cloud polls."""
+from __future__ import annotations
+
+from enum import StrEnum
+import random
+import time
+
+
+class BreakerState(StrEnum):
+    """State of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """Return the delay before retry number attempt (starting from 0).
+
+    Uses exponential backoff with full jitter, so instances that failed
+    together don't retry together.
+    """
+    return random.uniform(0, min(maximum, base * 2**attempt))
+
+
+class CircuitBreaker:
+    """Stops calling the cloud after repeated failures.
+
+    After failure_threshold consecutive failures the breaker opens and every
+    request is refused for reset_timeout seconds. Then a single probe is let
+    through (half-open): its success closes the breaker, its failure opens it
+    again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> BreakerState:
+        """Return the current state."""
+        if self._opened_at is None:
+            return BreakerState.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return BreakerState.HALF_OPEN
+        return BreakerState.OPEN
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now."""
+        state = self.state
+        if state is BreakerState.CLOSED:
+            return True
+        if state is BreakerState.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Close the breaker."""
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the breaker if needed."""
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+        self._probing = False
@@ -0,0 +1,122 @@
+"""Rolling power statistics over fixed time windows."""
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from collections.abc import Callable
+import math
+
+from .api import AtonSnapshot
+from .const import ROLLING_WINDOWS
+
+# Powers with rolling statistics, keyed like their sensors
+ROLLING_FIELDS: dict[str, Callable[[AtonSnapshot], int]] = {
+    "home": lambda data: data.house_consumption,
+    "grid_power": lambda data: data.grid_power * -1,
+    "battery_power": lambda data: data.battery_power,
+}
+
+
+class RollingWindow:
+    """Minimum, maximum and mean of the samples of the last window seconds.
+
+    The samples live in a ring buffer of fixed capacity. The minimum and the
+    maximum are kept by monotonic deques of sample numbers and the mean by a
+    running sum, so adding a sample costs amortized constant time however
+    long the window. When samples come faster than the capacity allows, the
+    oldest ones are dropped early.
+    """
+
+    __slots__ = (
+        "window",
+        "_capacity",
+        "_times",
+        "_values",
+        "_first",
+        "_next",
+        "_sum",
+        "_min",
+        "_max",
+    )
+
+    def __init__(self, window: float, capacity: int) -> None:
+        self.window = window
+        self._capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        # Numbers of the oldest sample kept and of the next one
+        self._first = 0
+        self._next = 0
+        self._sum = 0.0
+        # Sample numbers with increasing (min) and decreasing (max) values
+        self._min: deque[int] = deque()
+        self._max: deque[int] = deque()
+
+    def add(self, time: float, value: float) -> None:
+        """Add a sample taken at time, in seconds."""
+        cutoff = time - self.window
+        while self._first < self._next and (
+            self._times[self._first % self._capacity] <= cutoff
+            or self._next - self._first == self._capacity
+        ):
+            self._drop_oldest()
+
+        index = self._next % self._capacity
+        self._times[index] = time
+        self._values[index] = value
+        self._sum += value
+        values, capacity = self._values, self._capacity
+        while self._min and values[self._min[-1] % capacity] >= value:
+            self._min.pop()
+        self._min.append(self._next)
+        while self._max and values[self._max[-1] % capacity] <= value:
+            self._max.pop()
+        self._max.append(self._next)
+        self._next += 1
+
+    def _drop_oldest(self) -> None:
+        self._sum -= self._values[self._first % self._capacity]
+        if self._min[0] == self._first:
+            self._min.popleft()
+        if self._max[0] == self._first:
+            self._max.popleft()
+        self._first += 1
+
+    @property
+    def min(self) -> float | None:
+        """Return the smallest sample in the window."""
+        return self._values[self._min[0] % self._capacity] if self._min else None
+
+    @property
+    def max(self) -> float | None:
+        """Return the largest sample in the window."""
+        return self._values[self._max[0] % self._capacity] if self._max else None
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean of the samples in the window."""
+        count = self._next - self._first
+        return self._sum / count if count else None
+
+
+class RollingStats:
+    """Rolling windows of every field in ROLLING_FIELDS."""
+
+    def __init__(self, min_interval: float) -> None:
+        self.windows = {
+            (field, window): RollingWindow(window, math.ceil(window / min_interval) + 1)
+            for field in ROLLING_FIELDS
+            for window in ROLLING_WINDOWS
+        }
+
+    def get(self, field: str, window: int) -> RollingWindow:
+        """Return the window of a field."""
+        return self.windows[field, window]
+
+    def update(self, data: AtonSnapshot) -> None:
+        """Add the powers of a snapshot to every window."""
+        time = data.fetched_at.timestamp()
+        for field, value_fn in ROLLING_FIELDS.items():
+            value = value_fn(data)
+            for window in ROLLING_WINDOWS:
+                self.windows[field, window].add(time, value)
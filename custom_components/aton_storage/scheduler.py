@@ -0,0 +1,160 @@
+"""Shared polling scheduler for all the configured Aton plants."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+import logging
+from typing import TYPE_CHECKING
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+
+from .const import (
+    ACCOUNT_MIN_SPACING,
+    DOMAIN,
+    MAX_CONCURRENT_POLLS,
+    STARTUP_SPREAD,
+)
+
+if TYPE_CHECKING:
+    from .coordinator import ApiCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+
+# Fractional part of the golden ratio: successive multiples of it spread the
+# plants evenly over the poll interval however many of them are added.
+_GOLDEN_FRACTION = 0.6180339887498949
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> AtonPollScheduler:
+    """Return the scheduler shared by every config entry."""
+    if (scheduler := hass.data.get(DATA_SCHEDULER)) is None:
+        scheduler = hass.data[DATA_SCHEDULER] = AtonPollScheduler(hass)
+    return scheduler
+
+
+class AtonPollScheduler:
+    """Polls every plant under a global concurrency limit.
+
+    Each plant keeps a fixed phase within its poll interval, so N plants
+    don't hit the cloud in the same second, and requests made with the same
+    account are spaced by at least ACCOUNT_MIN_SPACING seconds.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_concurrent: int = MAX_CONCURRENT_POLLS,
+        account_spacing: float = ACCOUNT_MIN_SPACING,
+    ) -> None:
+        self.hass = hass
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._account_spacing = account_spacing
+        self._account_locks: dict[str, asyncio.Lock] = {}
+        self._account_last: dict[str, float] = {}
+        self._timers: dict[ApiCoordinator, asyncio.TimerHandle] = {}
+        self._startup_timers: dict[ApiCoordinator, asyncio.TimerHandle] = {}
+        self._polls: dict[ApiCoordinator, asyncio.Task] = {}
+        self._added = 0
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_stop)
+
+    @callback
+    def async_add(self, coordinator: ApiCoordinator) -> None:
+        """Start polling a plant."""
+        interval = coordinator.poll_interval.total_seconds()
+        phase = (self._added * _GOLDEN_FRACTION) % 1.0
+        self._added += 1
+        now = self.hass.loop.time()
+        self._schedule(coordinator, now + phase * interval)
+        if phase * interval > STARTUP_SPREAD:
+            # Don't leave the plant without data for most of an interval:
+            # fetch it once in the background, spread over the startup window.
+            self._startup_timers[coordinator] = self.hass.loop.call_at(
+                now + phase * STARTUP_SPREAD, self._start_poll, coordinator, None, None
+            )
+
+    @callback
+    def async_remove(self, coordinator: ApiCoordinator) -> None:
+        """Stop polling a plant."""
+        if timer := self._timers.pop(coordinator, None):
+            timer.cancel()
+        if timer := self._startup_timers.pop(coordinator, None):
+            timer.cancel()
+        self._polls.pop(coordinator, None)
+
+    @asynccontextmanager
+    async def async_slot(self, account: str) -> AsyncIterator[None]:
+        """Wait for the account rate limit and a free global poll slot."""
+        loop = self.hass.loop
+        lock = self._account_locks.setdefault(account, asyncio.Lock())
+        async with lock:
+            last = self._account_last.get(account)
+            if (
+                last is not None
+                and (wait := last + self._account_spacing - loop.time()) > 0
+            ):
+                await asyncio.sleep(wait)
+            self._account_last[account] = loop.time()
+        async with self._semaphore:
+            yield
+
+    @callback
+    def _schedule(self, coordinator: ApiCoordinator, when: float) -> None:
+        self._timers[coordinator] = self.hass.loop.call_at(
+            when, self._fire, coordinator, when
+        )
+
+    @callback
+    def _fire(self, coordinator: ApiCoordinator, due: float) -> None:
+        """Start a poll and schedule the next one on the same phase."""
+        now = self.hass.loop.time()
+        interval = coordinator.poll_interval.total_seconds()
+        next_due = due + interval
+        if next_due <= now:
+            # The loop was blocked for a whole interval: skip the missed polls
+            next_due += ((now - next_due) // interval + 1) * interval
+        self._schedule(coordinator, next_due)
+        self._start_poll(coordinator, due, interval)
+
+    @callback
+    def _start_poll(
+        self, coordinator: ApiCoordinator, due: float | None, interval: float | None
+    ) -> None:
+        if due is None:
+            self._startup_timers.pop(coordinator, None)
+        if coordinator not in self._timers:
+            return
+        if (poll := self._polls.get(coordinator)) is not None and not poll.done():
+            _LOGGER.debug("%s: previous poll still running, skipping", coordinator.name)
+            return
+        self._polls[coordinator] = self.hass.async_create_background_task(
+            self._async_poll(coordinator, due, interval), f"{coordinator.name} poll"
+        )
+
+    async def _async_poll(
+        self, coordinator: ApiCoordinator, due: float | None, interval: float | None
+    ) -> None:
+        await coordinator.async_refresh_coalesced()
+        if isinstance(coordinator.last_exception, ConfigEntryAuthFailed):
+            # Reauth has started: the entry is reloaded once it succeeds
+            self.async_remove(coordinator)
+            return
+        if due is None:
+            return
+        new_interval = coordinator.poll_interval.total_seconds()
+        if new_interval != interval and (timer := self._timers.get(coordinator)):
+            # Adaptive polling changed the pace: move the pending poll
+            timer.cancel()
+            self._schedule(coordinator, max(due + new_interval, self.hass.loop.time()))
+
+    @callback
+    def _async_stop(self, event: Event) -> None:
+        for timer in (*self._timers.values(), *self._startup_timers.values()):
+            timer.cancel()
+        self._timers.clear()
+        self._startup_timers.clear()
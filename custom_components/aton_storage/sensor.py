@@ -1,432 +1,566 @@
 """Platform for sensor integration."""
 from __future__ import annotations
-from datetime import timedelta
-import logging
-
-import async_timeout
-from homeassistant.components.binary_sensor import BinarySensorEntity
 
-from homeassistant.exceptions import ConfigEntryAuthFailed
-
-from homeassistant.helpers.entity import DeviceInfo
-from pyaton import AtonAPI, NoAuth, CommunicationFailed
-from .const import DOMAIN
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+import time
+from typing import TYPE_CHECKING
 
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import PERCENTAGE, POWER_WATT, ENERGY_WATT_HOUR
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    Platform,
+    UnitOfEnergy,
+    UnitOfInformation,
+    UnitOfPower,
+    UnitOfTime,
+)
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.typing import DiscoveryInfoType
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-    UpdateFailed,
+from homeassistant.helpers.typing import DiscoveryInfoType, StateType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .api import AtonSnapshot
+from .const import (
+    DOMAIN,
+    GROUP_COST,
+    GROUP_ENERGY,
+    GROUP_POWER,
+    GROUP_SELF_SUFFICIENCY,
+    ROLLING_WINDOWS,
 )
+from .coordinator import ApiCoordinator
+from .energy import FLOWS
+from .entity import ChangeAwareEntity, async_enabled_descriptions
+from .rolling import ROLLING_FIELDS
+
+if TYPE_CHECKING:
+    from .tariff import CostTracker
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def async_setup_entry(
-    hass: HomeAssistant,
-    config: ConfigEntry,
-    add_entities: AddEntitiesCallback,
-    discovery_info: DiscoveryInfoType | None = None,
-) -> None:
-    """Set up the sensor platform."""
-    username = config.data["username"]
-    sn = config.data["sn"]
-    id_impianto = config.data["id_impianto"]
-    api = await hass.async_add_executor_job(AtonAPI, username, sn, id_impianto)
-    api.cookies = config.data["cookies"]
-    coordinator = ApiCoordinator(hass, api)
-
-    add_entities(
-        [
-            # power
-            BatteryStatus(coordinator),
-            HouseConsumption(coordinator),
-            BatteryPower(coordinator),
-            SolarProduction(coordinator),
-            GridPower(coordinator),
-            # power direction
-            GridToHouse(coordinator),
-            SolarToBattery(coordinator),
-            SolarToGrid(coordinator),
-            BatteryToHouse(coordinator),
-            SolarToHouse(coordinator),
-            GridToBattery(coordinator),
-            BatteryToGrid(coordinator),
-            # energy
-            SoldEnergy(coordinator),
-            SolarEnergy(coordinator),
-            SelfConsumedEnergy(coordinator),
-            BoughtEnergy(coordinator),
-            ConsumedEnergy(coordinator),
-            # other
-            SelfSufficiency(coordinator),
-        ]
-    )
+@dataclass
+class AtonSensorEntityDescriptionMixin:
+    """Mixin for required keys."""
 
+    value_fn: Callable[[AtonSnapshot], StateType]
+    # Entity group the sensor belongs to
+    group: str
 
-class ApiCoordinator(DataUpdateCoordinator):
-    """My custom coordinator."""
 
-    def __init__(self, hass: HomeAssistant | None, api: AtonAPI) -> None:
-        """Initialize my coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            # Name of the data. For logging purposes.
-            name="Aton Storage",
-            # Polling interval. Will only be polled if there are subscribers.
-            update_interval=timedelta(seconds=api.interval),
-        )
-        self.api = api
-
-    async def _async_update_data(self):
-        """Fetch data from API endpoint.
-
-        This is the place to pre-process the data to lookup tables
-        so entities can quickly look up their data.
-        """
-        try:
-            # Note: asyncio.TimeoutError and aiohttp.ClientError are already
-            # handled by the data update coordinator.
-            async with async_timeout.timeout(self.api.interval):
-                return await self.hass.async_add_executor_job(self.api.fetch_data)
-        except NoAuth as err:
-            # Raising ConfigEntryAuthFailed will cancel future updates
-            # and start a config flow with SOURCE_REAUTH (async_step_reauth)
-            raise ConfigEntryAuthFailed(err) from err
-        except CommunicationFailed as err:
-            raise UpdateFailed(f"Error communicating with API: {err}") from err
-
-
-class BatteryStatus(SensorEntity, CoordinatorEntity):
-    """Representation of a Sensor."""
+@dataclass
+class AtonSensorEntityDescription(
+    SensorEntityDescription, AtonSensorEntityDescriptionMixin
+):
+    """Describes an Aton sensor."""
 
-    @property
-    def device_info(self) -> DeviceInfo | None:
-        return {
-            "identifiers": {
-                # Serial numbers are unique identifiers within a specific domain
-                (DOMAIN, "aton_storage_" + self.coordinator.api.username)
-            },
-            "name": f"Fotovoltaico {self.coordinator.api.username}",
-            "manufacturer": "Aton Green Storage",
-        }
-
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Batteria Casa"
-        self._attr_native_unit_of_measurement = PERCENTAGE
-        self._attr_device_class = SensorDeviceClass.BATTERY
-        self._attr_state_class = SensorStateClass.MEASUREMENT
-        self._attr_unique_id = "aton_battery_" + coordinator.api.username
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._attr_native_value = self.coordinator.api.status.battery_status
-        self.async_write_ha_state()
+    # Whether the power deadband options apply to this sensor
+    deadband: bool = False
 
 
-class BasePowerSensor(SensorEntity, CoordinatorEntity):
-    """Representation of a Sensor."""
+def _power(key: str, name: str, value_fn: Callable[[AtonSnapshot], int]):
+    return AtonSensorEntityDescription(
+        key=key,
+        name=name,
+        value_fn=value_fn,
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        group=GROUP_POWER,
+        deadband=True,
+    )
 
-    @property
-    def device_info(self) -> DeviceInfo | None:
-        return {
-            "identifiers": {(DOMAIN, "aton_storage_" + self.coordinator.api.username)}
-        }
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_native_unit_of_measurement = POWER_WATT
-        self._attr_device_class = SensorDeviceClass.POWER
-        self._attr_state_class = SensorStateClass.MEASUREMENT
+def _energy(key: str, name: str, value_fn: Callable[[AtonSnapshot], int]):
+    return AtonSensorEntityDescription(
+        key=key,
+        name=name,
+        value_fn=value_fn,
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        group=GROUP_ENERGY,
+    )
 
-    def update(self) -> None:
-        """update"""
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self.update()
-        self.async_write_ha_state()
 
+SENSORS: tuple[AtonSensorEntityDescription, ...] = (
+    AtonSensorEntityDescription(
+        key="battery",
+        name="Batteria Casa",
+        value_fn=lambda data: data.battery_status,
+        device_class=SensorDeviceClass.BATTERY,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        group=GROUP_POWER,
+    ),
+    # power
+    _power("home", "Consumo Casa", lambda data: data.house_consumption),
+    _power("battery_power", "Potenza Batteria", lambda data: data.battery_power),
+    _power("solar_power", "Produzione Pannelli", lambda data: data.solar_production),
+    _power("grid_power", "Potenza Rete", lambda data: data.grid_power * -1),
+    # energy
+    _energy("sold_energy", "Energia Venduta", lambda data: data.sold_energy),
+    _energy("solar_energy", "Energia Solare", lambda data: data.solar_energy),
+    _energy(
+        "self_energy", "Energia Auto Consumata", lambda data: data.self_consumed_energy
+    ),
+    _energy("bought_energy", "Energia Comprata", lambda data: data.bought_energy),
+    _energy("consumed_energy", "Energia Consumata", lambda data: data.consumed_energy),
+    # other
+    AtonSensorEntityDescription(
+        key="self_sufficiency",
+        name="Autosufficienza",
+        value_fn=lambda data: (
+            round(data.self_sufficiency, 2)
+            if data.self_sufficiency is not None
+            else None
+        ),
+        device_class=SensorDeviceClass.POWER_FACTOR,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        group=GROUP_SELF_SUFFICIENCY,
+    ),
+)
 
-class HouseConsumption(BasePowerSensor):
-    """Representation of a Sensor."""
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Consumo Casa"
-        self._attr_unique_id = "aton_home_" + coordinator.api.username
+@dataclass
+class AtonFlowEnergySensorEntityDescriptionMixin:
+    """Mixin for required keys."""
 
-    def update(self) -> None:
-        self._attr_native_value = self.coordinator.api.status.house_consumption
+    flow: str
 
 
-class BatteryPower(BasePowerSensor):
-    """Representation of a Sensor."""
+@dataclass
+class AtonFlowEnergySensorEntityDescription(
+    SensorEntityDescription, AtonFlowEnergySensorEntityDescriptionMixin
+):
+    """Describes the locally integrated energy of a power flow."""
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Potenza Batteria"
-        self._attr_unique_id = "aton_battery_power_" + coordinator.api.username
+    device_class: SensorDeviceClass | None = SensorDeviceClass.ENERGY
+    native_unit_of_measurement: str | None = UnitOfEnergy.WATT_HOUR
+    state_class: SensorStateClass | str | None = SensorStateClass.TOTAL_INCREASING
+    suggested_display_precision: int | None = 0
+    group: str | None = GROUP_ENERGY
 
-    def update(self) -> None:
-        self._attr_native_value = self.coordinator.api.status.battery_power
 
+FLOW_ENERGY_SENSORS: tuple[AtonFlowEnergySensorEntityDescription, ...] = tuple(
+    AtonFlowEnergySensorEntityDescription(
+        key=f"{flow}_energy", name=f"Energia {name}", flow=flow
+    )
+    for flow, name in zip(
+        FLOWS,
+        (
+            "da Rete a Casa",
+            "da Pannelli a Batteria",
+            "da Pannelli a Rete",
+            "da Batteria a Casa",
+            "da Pannelli a Casa",
+            "da Rete a Batteria",
+            "da Batteria a Rete",
+        ),
+    )
+)
 
-class SolarProduction(BasePowerSensor):
-    """Representation of a Sensor."""
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Produzione Pannelli"
-        self._attr_unique_id = "aton_solar_power_" + coordinator.api.username
+@dataclass
+class AtonRollingSensorEntityDescriptionMixin:
+    """Mixin for required keys."""
 
-    def update(self) -> None:
-        self._attr_native_value = self.coordinator.api.status.solar_production
+    field: str
+    window: int
+    # RollingWindow property: min, max or mean
+    statistic: str
 
 
-class GridPower(BasePowerSensor):
-    """Representation of a Sensor."""
+@dataclass
+class AtonRollingSensorEntityDescription(
+    SensorEntityDescription, AtonRollingSensorEntityDescriptionMixin
+):
+    """Describes a rolling statistic of a power."""
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Potenza Rete"
-        self._attr_unique_id = "aton_grid_power_" + coordinator.api.username
+    device_class: SensorDeviceClass | None = SensorDeviceClass.POWER
+    native_unit_of_measurement: str | None = UnitOfPower.WATT
+    state_class: SensorStateClass | str | None = SensorStateClass.MEASUREMENT
+    entity_registry_enabled_default: bool = False
+    group: str | None = GROUP_POWER
 
-    def update(self) -> None:
-        self._attr_native_value = self.coordinator.api.status.grid_power * -1
 
+_ROLLING_NAMES = {
+    "home": "Consumo Casa",
+    "grid_power": "Potenza Rete",
+    "battery_power": "Potenza Batteria",
+}
+_STATISTIC_NAMES = {"min": "Minimo", "max": "Massimo", "mean": "Media"}
 
-class BaseBinarySensor(BinarySensorEntity, CoordinatorEntity):
-    """Representation of a Sensor."""
 
-    @property
-    def device_info(self) -> DeviceInfo | None:
-        return {
-            "identifiers": {(DOMAIN, "aton_storage_" + self.coordinator.api.username)}
-        }
+def _window_label(window: int) -> str:
+    return f"{window // 3600} h" if window % 3600 == 0 else f"{window // 60} min"
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_device_class = SensorDeviceClass.POWER
 
-    @property
-    def is_on(self) -> bool:
-        """update"""
+ROLLING_SENSORS: tuple[AtonRollingSensorEntityDescription, ...] = tuple(
+    AtonRollingSensorEntityDescription(
+        key=f"{field}_{statistic}_{window}",
+        name=(
+            f"{_ROLLING_NAMES[field]} {_STATISTIC_NAMES[statistic]}"
+            f" {_window_label(window)}"
+        ),
+        field=field,
+        window=window,
+        statistic=statistic,
+    )
+    for field in ROLLING_FIELDS
+    for window in ROLLING_WINDOWS
+    for statistic in _STATISTIC_NAMES
+)
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self.async_write_ha_state()
 
+@dataclass
+class AtonEstimateSensorEntityDescriptionMixin:
+    """Mixin for required keys."""
 
-class GridToHouse(BaseBinarySensor):
-    """Representation of a Sensor."""
+    value_fn: Callable[[ApiCoordinator], StateType]
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Da Rete a Casa"
-        self._attr_unique_id = "aton_grid_house_" + coordinator.api.username
 
-    @property
-    def is_on(self) -> bool:
-        return self.coordinator.api.status.is_grid_to_house
+@dataclass
+class AtonEstimateSensorEntityDescription(
+    SensorEntityDescription, AtonEstimateSensorEntityDescriptionMixin
+):
+    """Describes a value estimated from the recent snapshots."""
 
+    group: str | None = GROUP_POWER
 
-class SolarToBattery(BaseBinarySensor):
-    """Representation of a Sensor."""
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Da Pannelli a Batteria"
-        self._attr_unique_id = "aton_solar_battery_" + coordinator.api.username
+ESTIMATE_SENSORS: tuple[AtonEstimateSensorEntityDescription, ...] = (
+    AtonEstimateSensorEntityDescription(
+        key="battery_time_to_full",
+        name="Tempo a Batteria Carica",
+        value_fn=lambda coordinator: coordinator.battery.time_to_full,
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    AtonEstimateSensorEntityDescription(
+        key="battery_time_to_reserve",
+        name="Tempo a Riserva Batteria",
+        value_fn=lambda coordinator: coordinator.battery.time_to_reserve,
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+)
 
-    @property
-    def is_on(self) -> bool:
-        return self.coordinator.api.status.is_solar_to_battery
 
+@dataclass
+class AtonCostSensorEntityDescriptionMixin:
+    """Mixin for required keys."""
+
+    value_fn: Callable[[CostTracker], float]
+    last_reset_fn: Callable[[CostTracker], datetime | None]
+
+
+@dataclass
+class AtonCostSensorEntityDescription(
+    SensorEntityDescription, AtonCostSensorEntityDescriptionMixin
+):
+    """Describes a cost or revenue total of the current day or month."""
+
+    device_class: SensorDeviceClass | None = SensorDeviceClass.MONETARY
+    state_class: SensorStateClass | str | None = SensorStateClass.TOTAL
+    suggested_display_precision: int | None = 2
+    group: str | None = GROUP_COST
+
+
+COST_SENSORS: tuple[AtonCostSensorEntityDescription, ...] = (
+    AtonCostSensorEntityDescription(
+        key="daily_cost",
+        name="Costo Giornaliero",
+        value_fn=lambda cost: cost.daily_cost,
+        last_reset_fn=lambda cost: cost.day_start,
+    ),
+    AtonCostSensorEntityDescription(
+        key="daily_revenue",
+        name="Ricavo Giornaliero",
+        value_fn=lambda cost: cost.daily_revenue,
+        last_reset_fn=lambda cost: cost.day_start,
+    ),
+    AtonCostSensorEntityDescription(
+        key="monthly_cost",
+        name="Costo Mensile",
+        value_fn=lambda cost: cost.monthly_cost,
+        last_reset_fn=lambda cost: cost.month_start,
+    ),
+    AtonCostSensorEntityDescription(
+        key="monthly_revenue",
+        name="Ricavo Mensile",
+        value_fn=lambda cost: cost.monthly_revenue,
+        last_reset_fn=lambda cost: cost.month_start,
+    ),
+)
 
-class SolarToGrid(BaseBinarySensor):
-    """Representation of a Sensor."""
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Da Pannelli a Rete"
-        self._attr_unique_id = "aton_solar_grid_" + coordinator.api.username
+@dataclass
+class AtonDiagnosticSensorEntityDescriptionMixin:
+    """Mixin for required keys."""
+
+    value_fn: Callable[[ApiCoordinator], StateType]
+
+
+@dataclass
+class AtonDiagnosticSensorEntityDescription(
+    SensorEntityDescription, AtonDiagnosticSensorEntityDescriptionMixin
+):
+    """Describes a polling diagnostic of an Aton plant."""
+
+    entity_category: EntityCategory | None = EntityCategory.DIAGNOSTIC
+    entity_registry_enabled_default: bool = False
+
+
+DIAGNOSTIC_SENSORS: tuple[AtonDiagnosticSensorEntityDescription, ...] = (
+    AtonDiagnosticSensorEntityDescription(
+        key="skipped_writes",
+        name="Scritture Evitate",
+        value_fn=lambda coordinator: coordinator.skipped_writes,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    AtonDiagnosticSensorEntityDescription(
+        key="writes_per_poll",
+        name="Scritture per Lettura",
+        value_fn=lambda coordinator: coordinator.stats.last_writes_per_poll,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    AtonDiagnosticSensorEntityDescription(
+        key="fetch_latency",
+        name="Latenza Lettura",
+        value_fn=lambda coordinator: (
+            round(last.network, 3) if (last := coordinator.stats.last) else None
+        ),
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    AtonDiagnosticSensorEntityDescription(
+        key="slot_wait",
+        name="Attesa Lettura",
+        value_fn=lambda coordinator: (
+            round(last.wait, 3) if (last := coordinator.stats.last) else None
+        ),
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    AtonDiagnosticSensorEntityDescription(
+        key="payload_size",
+        name="Dimensione Risposta",
+        value_fn=lambda coordinator: coordinator.api.last_payload_size,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    AtonDiagnosticSensorEntityDescription(
+        key="auth_refreshes",
+        name="Rinnovi Sessione",
+        value_fn=lambda coordinator: coordinator.session.refresh_count,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    AtonDiagnosticSensorEntityDescription(
+        key="consecutive_failures",
+        name="Errori Consecutivi",
+        value_fn=lambda coordinator: coordinator.stats.consecutive_failures,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+)
 
-    @property
-    def is_on(self) -> bool:
-        return self.coordinator.api.status.is_solar_to_grid
 
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config: ConfigEntry,
+    add_entities: AddEntitiesCallback,
+    discovery_info: DiscoveryInfoType | None = None,
+) -> None:
+    """Set up the sensor platform."""
+    coordinator: ApiCoordinator = hass.data[DOMAIN][config.entry_id]
 
-class BatteryToHouse(BaseBinarySensor):
-    """Representation of a Sensor."""
+    def enabled(descriptions):
+        return async_enabled_descriptions(
+            hass, coordinator, Platform.SENSOR, descriptions
+        )
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Da Batteria a Casa"
-        self._attr_unique_id = "aton_battery_house_" + coordinator.api.username
+    entities: list[SensorEntity] = [
+        AtonSensor(coordinator, description) for description in enabled(SENSORS)
+    ]
+    entities.extend(
+        AtonFlowEnergySensor(coordinator, description)
+        for description in enabled(FLOW_ENERGY_SENSORS)
+    )
+    entities.extend(
+        AtonRollingSensor(coordinator, description)
+        for description in enabled(ROLLING_SENSORS)
+    )
+    entities.extend(
+        AtonEstimateSensor(coordinator, description)
+        for description in enabled(ESTIMATE_SENSORS)
+    )
+    entities.extend(
+        AtonCostSensor(coordinator, description)
+        for description in enabled(COST_SENSORS)
+    )
+    entities.extend(
+        AtonDiagnosticSensor(coordinator, description)
+        for description in DIAGNOSTIC_SENSORS
+    )
+    add_entities(entities, update_before_add=False)
 
-    @property
-    def is_on(self) -> bool:
-        return self.coordinator.api.status.is_battery_to_house
 
+class AtonSensor(RestoreSensor, ChangeAwareEntity):
+    """Sensor driven by an AtonSensorEntityDescription."""
 
-class SolarToHouse(BaseBinarySensor):
-    """Representation of a Sensor."""
+    entity_description: AtonSensorEntityDescription
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Da Pannelli a Casa"
-        self._attr_unique_id = "aton_solar_house_" + coordinator.api.username
+    def __init__(
+        self, coordinator: ApiCoordinator, description: AtonSensorEntityDescription
+    ) -> None:
+        super().__init__(coordinator, description.key, description.name)
+        self.entity_description = description
 
-    @property
-    def is_on(self) -> bool:
-        return self.coordinator.api.status.is_solar_to_house
+    def update(self) -> None:
+        self._attr_native_value = self.entity_description.value_fn(
+            self.coordinator.data
+        )
 
+    def _is_insignificant(self, old, new) -> bool:
+        if not self.entity_description.deadband or old is None or new is None:
+            return old == new
+        if (interval := self.coordinator.power_write_interval) is not None:
+            return time.monotonic() - self._last_write_time < interval
+        delta = abs(new - old)
+        if delta <= self.coordinator.power_deadband:
+            return True
+        percent = self.coordinator.power_deadband_percent
+        return old != 0 and delta * 100 <= abs(old) * percent
 
-class GridToBattery(BaseBinarySensor):
-    """Representation of a Sensor."""
+    async def async_restore_last_state(self) -> None:
+        if (last := await self.async_get_last_sensor_data()) is not None:
+            self._attr_native_value = last.native_value
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Da Rete a Batteria"
-        self._attr_unique_id = "aton_grid_battery_" + coordinator.api.username
 
-    @property
-    def is_on(self) -> bool:
-        return self.coordinator.api.status.is_grid_to_battery
+class AtonFlowEnergySensor(SensorEntity, ChangeAwareEntity):
+    """Energy of a power flow, integrated between the cloud polls."""
 
+    entity_description: AtonFlowEnergySensorEntityDescription
 
-class BatteryToGrid(BaseBinarySensor):
-    """Representation of a Sensor."""
+    def __init__(
+        self,
+        coordinator: ApiCoordinator,
+        description: AtonFlowEnergySensorEntityDescription,
+    ) -> None:
+        super().__init__(coordinator, description.key, description.name)
+        self.entity_description = description
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Da Batteria a Rete"
-        self._attr_unique_id = "aton_battery_grid_" + coordinator.api.username
+    def update(self) -> None:
+        self._attr_native_value = round(
+            self.coordinator.flow_energy.value(self.entity_description.flow), 2
+        )
 
-    @property
-    def is_on(self) -> bool:
-        return self.coordinator.api.status.is_battery_to_grid
+    async def async_restore_last_state(self) -> None:
+        # The counters are restored by the coordinator
+        self.update()
 
 
-class BaseEnergySensor(SensorEntity, CoordinatorEntity):
-    """Representation of a Sensor."""
+class AtonRollingSensor(SensorEntity, ChangeAwareEntity):
+    """Minimum, maximum or mean of a power over a rolling window."""
 
-    @property
-    def device_info(self) -> DeviceInfo | None:
-        return {
-            "identifiers": {(DOMAIN, "aton_storage_" + self.coordinator.api.username)}
-        }
+    entity_description: AtonRollingSensorEntityDescription
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_native_unit_of_measurement = ENERGY_WATT_HOUR
-        self._attr_device_class = SensorDeviceClass.ENERGY
-        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+    def __init__(
+        self,
+        coordinator: ApiCoordinator,
+        description: AtonRollingSensorEntityDescription,
+    ) -> None:
+        super().__init__(coordinator, description.key, description.name)
+        self.entity_description = description
+        self._window = coordinator.rolling.get(description.field, description.window)
 
     def update(self) -> None:
-        """update"""
+        value = getattr(self._window, self.entity_description.statistic)
+        self._attr_native_value = round(value, 1) if value is not None else None
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self.update()
-        self.async_write_ha_state()
 
+class AtonEstimateSensor(SensorEntity, ChangeAwareEntity):
+    """Value estimated by the coordinator from the recent snapshots."""
 
-class SoldEnergy(BaseEnergySensor):
-    """Representation of a Sensor"""
+    entity_description: AtonEstimateSensorEntityDescription
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Energia Venduta"
-        self._attr_unique_id = "aton_sold_energy_" + coordinator.api.username
+    def __init__(
+        self,
+        coordinator: ApiCoordinator,
+        description: AtonEstimateSensorEntityDescription,
+    ) -> None:
+        super().__init__(coordinator, description.key, description.name)
+        self.entity_description = description
 
     def update(self) -> None:
-        self._attr_native_value = self.coordinator.api.status.sold_energy
-
-
-class SolarEnergy(BaseEnergySensor):
-    """Representation of a Sensor"""
-
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Energia Solare"
-        self._attr_unique_id = "aton_solar_energy_" + coordinator.api.username
+        self._attr_native_value = self.entity_description.value_fn(self.coordinator)
 
-    def update(self) -> None:
-        self._attr_native_value = self.coordinator.api.status.solar_energy
 
+class AtonCostSensor(SensorEntity, ChangeAwareEntity):
+    """Cost of the energy bought, or revenue of the energy sold."""
 
-class SelfConsumedEnergy(BaseEnergySensor):
-    """Representation of a Sensor"""
+    entity_description: AtonCostSensorEntityDescription
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Energia Auto Consumata"
-        self._attr_unique_id = "aton_self_energy_" + coordinator.api.username
+    def __init__(
+        self,
+        coordinator: ApiCoordinator,
+        description: AtonCostSensorEntityDescription,
+    ) -> None:
+        super().__init__(coordinator, description.key, description.name)
+        self.entity_description = description
+        self._attr_native_unit_of_measurement = coordinator.hass.config.currency
 
     def update(self) -> None:
-        self._attr_native_value = self.coordinator.api.status.self_consumed_energy
-
+        cost = self.coordinator.cost
+        assert cost is not None
+        self._attr_native_value = round(self.entity_description.value_fn(cost), 4)
+        self._attr_last_reset = self.entity_description.last_reset_fn(cost)
 
-class BoughtEnergy(BaseEnergySensor):
-    """Representation of a Sensor"""
-
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Energia Comprata"
-        self._attr_unique_id = "aton_bought_energy_" + coordinator.api.username
+    async def async_restore_last_state(self) -> None:
+        # The totals are restored by the coordinator
+        self.update()
 
-    def update(self) -> None:
-        self._attr_native_value = self.coordinator.api.status.bought_energy
 
+class AtonDiagnosticSensor(SensorEntity, CoordinatorEntity[ApiCoordinator]):
+    """Reports how the polls of a plant are performing."""
 
-class ConsumedEnergy(BaseEnergySensor):
-    """Representation of a Sensor"""
+    entity_description: AtonDiagnosticSensorEntityDescription
 
-    def __init__(self, coordinator: ApiCoordinator) -> None:
+    def __init__(
+        self,
+        coordinator: ApiCoordinator,
+        description: AtonDiagnosticSensorEntityDescription,
+    ) -> None:
         super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Energia Consumata"
-        self._attr_unique_id = "aton_consumed_energy_" + coordinator.api.username
-
-    def update(self) -> None:
-        self._attr_native_value = self.coordinator.api.status.consumed_energy
-
-
-class SelfSufficiency(SensorEntity, CoordinatorEntity):
-    """Representation of a Sensor."""
+        self.entity_description = description
+        self._attr_name = f"{coordinator.api.username} {description.name}"
+        self._attr_unique_id = f"aton_{description.key}_{coordinator.api.username}"
+        self._attr_device_info = coordinator.device_info
 
     @property
-    def device_info(self) -> DeviceInfo | None:
-        return {
-            "identifiers": {(DOMAIN, "aton_storage_" + self.coordinator.api.username)},
-        }
-
-    def __init__(self, coordinator: ApiCoordinator) -> None:
-        super().__init__(coordinator)
-        self._attr_name = coordinator.api.username + " Autosufficienza"
-        self._attr_native_unit_of_measurement = PERCENTAGE
-        self._attr_device_class = SensorDeviceClass.POWER_FACTOR
-        self._attr_state_class = SensorStateClass.MEASUREMENT
-        self._attr_unique_id = "aton_self_sufficiency_" + coordinator.api.username
+    def available(self) -> bool:
+        """Diagnostics stay available while the cloud is down."""
+        return True
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        self._attr_native_value = round(self.coordinator.api.status.self_sufficiency, 2)
+        self._attr_native_value = self.entity_description.value_fn(self.coordinator)
         self.async_write_ha_state()
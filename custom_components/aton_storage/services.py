@@ -0,0 +1,129 @@
+"""Services of the Aton Storage integration."""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import DOMAIN
+from .coordinator import ApiCoordinator
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_WAIT = "wait"
+ATTR_START = "start"
+ATTR_END = "end"
+
+SERVICE_REFRESH = "refresh"
+SERVICE_EXPORT_ARCHIVE = "export_archive"
+
+REFRESH_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_WAIT, default=False): cv.boolean,
+    }
+)
+
+EXPORT_ARCHIVE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+    }
+)
+
+
+@callback
+def _async_coordinators(hass: HomeAssistant, call: ServiceCall) -> list[ApiCoordinator]:
+    """Return the coordinators a service call is about."""
+    coordinators: dict[str, ApiCoordinator] = hass.data.get(DOMAIN, {})
+    if (entry_id := call.data.get(ATTR_CONFIG_ENTRY_ID)) is None:
+        return list(coordinators.values())
+    if (coordinator := coordinators.get(entry_id)) is None:
+        raise HomeAssistantError(f"No loaded Aton Storage entry with id {entry_id}")
+    return [coordinator]
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    async def async_refresh(call: ServiceCall) -> ServiceResponse:
+        coordinators = _async_coordinators(hass, call)
+        if not (call.data[ATTR_WAIT] or call.return_response):
+            for coordinator in coordinators:
+                hass.async_create_task(
+                    coordinator.async_refresh_on_demand(), f"{coordinator.name} refresh"
+                )
+            return None
+
+        await asyncio.gather(
+            *(coordinator.async_refresh_on_demand() for coordinator in coordinators)
+        )
+        if failed := [c for c in coordinators if not c.last_update_success]:
+            raise HomeAssistantError(
+                "Cannot refresh "
+                + ", ".join(f"{c.api.username}: {c.last_exception}" for c in failed)
+            )
+        if not call.return_response:
+            return None
+        return {
+            coordinator.config_entry.entry_id: coordinator.data.as_dict()
+            for coordinator in coordinators
+        }
+
+    async def async_export_archive(call: ServiceCall) -> ServiceResponse:
+        from .archive import (  # pylint: disable=import-outside-toplevel
+            archive_dir,
+            export_csv,
+        )
+
+        start = dt_util.as_utc(call.data[ATTR_START])
+        end = dt_util.as_utc(call.data.get(ATTR_END) or dt_util.utcnow())
+        exports = {}
+        for coordinator in _async_coordinators(hass, call):
+            sn = coordinator.api.sn
+            if coordinator.archive is not None:
+                # Include the payloads still waiting to be written
+                await coordinator.archive.async_flush()
+            output = Path(
+                hass.config.path(
+                    DOMAIN,
+                    "exports",
+                    f"{slugify(sn)}_{start:%Y%m%dT%H%M%S}_{end:%Y%m%dT%H%M%S}.csv",
+                )
+            )
+            rows = await hass.async_add_executor_job(
+                export_csv, archive_dir(hass, sn), start, end, output
+            )
+            exports[coordinator.config_entry.entry_id] = {
+                "path": str(output),
+                "rows": rows,
+            }
+        return exports if call.return_response else None
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REFRESH,
+        async_refresh,
+        schema=REFRESH_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_ARCHIVE,
+        async_export_archive,
+        schema=EXPORT_ARCHIVE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,73 @@
+"""Polling performance counters for the Aton Storage integration."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any
+
+# Upper bounds, in seconds, of the fetch latency histogram buckets
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+
+@dataclass(slots=True)
+class PollTiming:
+    """Timings of a single poll."""
+
+    started: datetime
+    # Seconds spent waiting for the account rate limit and a scheduler slot
+    wait: float
+    # Seconds spent talking to the cloud, retries and backoff included
+    network: float
+    payload_size: int | None
+    success: bool
+
+
+class PollStats:
+    """Collects the timings of the polls of a plant."""
+
+    def __init__(self, keep: int) -> None:
+        self.timings: deque[PollTiming] = deque(maxlen=keep)
+        # One counter per LATENCY_BUCKETS entry, plus one for slower fetches
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.polls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_writes_per_poll = 0
+
+    @property
+    def last(self) -> PollTiming | None:
+        """Return the timings of the latest poll."""
+        return self.timings[-1] if self.timings else None
+
+    def record(self, timing: PollTiming) -> None:
+        """Add the timings of a finished poll."""
+        self.timings.append(timing)
+        self.polls += 1
+        if timing.success:
+            self.consecutive_failures = 0
+            self.latency_histogram[bisect_left(LATENCY_BUCKETS, timing.network)] += 1
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters in a JSON serializable form."""
+        return {
+            "polls": self.polls,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_writes_per_poll": self.last_writes_per_poll,
+            "latency_histogram": {
+                **{
+                    f"<={bound}s": count
+                    for bound, count in zip(LATENCY_BUCKETS, self.latency_histogram)
+                },
+                f">{LATENCY_BUCKETS[-1]}s": self.latency_histogram[-1],
+            },
+            "timings": [
+                {**asdict(timing), "started": timing.started.isoformat()}
+                for timing in self.timings
+            ],
+        }
@@ -0,0 +1,200 @@
+"""Cost of the energy bought and revenue of the energy sold.
+
+Prices follow the time-of-use bands set by ARERA, the Italian energy
+regulator, and its national holidays. Other schedules are not supported.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api import AtonSnapshot
+from .const import COST_SAVE_DELAY, DOMAIN
+
+STORAGE_VERSION = 1
+
+# ARERA time-of-use bands: F1 on weekdays from 8 to 19, F2 on
+# weekdays from 7 to 8 and from 19 to 23 and on Saturdays from 7 to 23, F3
+# at night, on Sundays and on holidays
+BANDS = ("F1", "F2", "F3")
+F1, F2, F3 = range(len(BANDS))
+
+
+def _band(weekday: int, hour: int) -> int:
+    if weekday < 5 and 8 <= hour < 19:
+        return F1
+    if weekday < 5 and (hour == 7 or 19 <= hour < 23):
+        return F2
+    if weekday == 5 and 7 <= hour < 23:
+        return F2
+    return F3
+
+
+# Band of every hour of the week, indexed by weekday * 24 + hour
+HOURLY_BANDS = tuple(_band(weekday, hour) for weekday in range(7) for hour in range(24))
+
+_FIXED_HOLIDAYS = (
+    (1, 1),
+    (1, 6),
+    (4, 25),
+    (5, 1),
+    (6, 2),
+    (8, 15),
+    (11, 1),
+    (12, 8),
+    (12, 25),
+    (12, 26),
+)
+
+
+def _easter(year: int) -> date:
+    """Return Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    j = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * j) // 451
+    month, day = divmod(h + j - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def italian_holidays(year: int) -> frozenset[date]:
+    """Return the national holidays of a year, all in band F3."""
+    return frozenset(
+        [date(year, month, day) for month, day in _FIXED_HOLIDAYS]
+        + [_easter(year) + timedelta(days=1)]
+    )
+
+
+class TariffSchedule:
+    """Buy and sell prices per kWh of every ARERA band."""
+
+    def __init__(self, buy: tuple[float, ...], sell: tuple[float, ...]) -> None:
+        self.buy = buy
+        self.sell = sell
+        self._holidays: dict[int, frozenset[date]] = {}
+
+    def band(self, when: datetime) -> int:
+        """Return the band of a local time."""
+        day = when.date()
+        if (holidays := self._holidays.get(day.year)) is None:
+            holidays = self._holidays[day.year] = italian_holidays(day.year)
+        if day in holidays:
+            return F3
+        return HOURLY_BANDS[day.weekday() * 24 + when.hour]
+
+
+class CostTracker:
+    """Daily and monthly cost and revenue of a plant.
+
+    Every snapshot prices the energy bought and sold since the previous one
+    at the band of its time, so the totals grow in constant time per poll.
+    The cloud counters restart from zero once a day, at the first decrease
+    after local midnight, which then counts from zero. Any other decrease is
+    a glitch of the cloud and adds nothing. The state is saved in .storage.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry_id: str, schedule: TariffSchedule
+    ) -> None:
+        self.schedule = schedule
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.cost.{entry_id}"
+        )
+        self.day: date | None = None
+        self.daily_cost = self.daily_revenue = 0.0
+        self.monthly_cost = self.monthly_revenue = 0.0
+        # Last value of each cloud counter, and the counters still due their
+        # daily restart from zero
+        self._last: dict[str, int | None] = {"bought": None, "sold": None}
+        self._resets_due: set[str] = set()
+
+    @property
+    def day_start(self) -> datetime | None:
+        """Return when the daily totals started."""
+        return dt_util.start_of_local_day(self.day) if self.day else None
+
+    @property
+    def month_start(self) -> datetime | None:
+        """Return when the monthly totals started."""
+        return dt_util.start_of_local_day(self.day.replace(day=1)) if self.day else None
+
+    async def async_load(self) -> None:
+        """Restore the totals saved before the last shutdown."""
+        if (data := await self._store.async_load()) is None:
+            return
+        self.day = date.fromisoformat(data["day"]) if data["day"] else None
+        self.daily_cost = data["daily_cost"]
+        self.daily_revenue = data["daily_revenue"]
+        self.monthly_cost = data["monthly_cost"]
+        self.monthly_revenue = data["monthly_revenue"]
+        self._last = {"bought": data["bought"], "sold": data["sold"]}
+        self._resets_due = set(data.get("resets_due", ()))
+
+    async def async_save(self) -> None:
+        """Save the totals now."""
+        await self._store.async_save(self._data_to_save())
+
+    def update(self, data: AtonSnapshot) -> None:
+        """Add the cost and revenue of the energy exchanged since the last poll."""
+        now = dt_util.as_local(data.fetched_at)
+        today = now.date()
+        if self.day != today:
+            if self.day is None or (self.day.year, self.day.month) != (
+                today.year,
+                today.month,
+            ):
+                self.monthly_cost = self.monthly_revenue = 0.0
+            self.daily_cost = self.daily_revenue = 0.0
+            self.day = today
+            # Only a counter above zero has a restart to come
+            self._resets_due = {name for name, value in self._last.items() if value}
+
+        band = self.schedule.band(now)
+        bought = self._delta("bought", data.bought_energy)
+        sold = self._delta("sold", data.sold_energy)
+        if bought:
+            cost = bought / 1000 * self.schedule.buy[band]
+            self.daily_cost += cost
+            self.monthly_cost += cost
+        if sold:
+            revenue = sold / 1000 * self.schedule.sell[band]
+            self.daily_revenue += revenue
+            self.monthly_revenue += revenue
+
+        self._store.async_delay_save(self._data_to_save, COST_SAVE_DELAY)
+
+    def _delta(self, counter: str, value: int | None) -> int:
+        """Return the Wh a cloud counter grew by since the last poll."""
+        if value is None:
+            return 0
+        last = self._last[counter]
+        if last is not None and value < last:
+            if counter not in self._resets_due:
+                # A glitch of the cloud: keep the previous value, so the
+                # recovery adds nothing either
+                return 0
+            # After the daily reset the counter holds the energy since midnight
+            self._resets_due.discard(counter)
+            last = 0
+        self._last[counter] = value
+        return value - last if last is not None else 0
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "day": self.day.isoformat() if self.day else None,
+            "daily_cost": self.daily_cost,
+            "daily_revenue": self.daily_revenue,
+            "monthly_cost": self.monthly_cost,
+            "monthly_revenue": self.monthly_revenue,
+            "bought": self._last["bought"],
+            "sold": self._last["sold"],
+            "resets_due": sorted(self._resets_due),
+        }
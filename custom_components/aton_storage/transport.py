@@ -0,0 +1,302 @@
+"""Transports carrying the requests of the Aton client.
+
+HttpTransport talks to the cloud. RecordingTransport wraps another transport
+and saves every response to a directory, which ReplayTransport can later
+serve back with artificial latency and errors, so the integration can be
+load-tested offline. The transport is picked in configuration.yaml:
+
+    aton_storage:
+      transport:
+        mode: replay
+        path: /config/aton_recordings
+        latency: 0.8
+        error_rate: 0.05
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+from dataclasses import asdict, dataclass, field
+from email.utils import parsedate_to_datetime
+from http.cookies import Morsel
+import itertools
+import json
+import logging
+from pathlib import Path
+import random
+import time
+from typing import Any
+
+import aiohttp
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+HOST = "https://www.atonstorage.com/atonTC/"
+USER_AGENT = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 14_2 like Mac OS X) "
+    "AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148"
+)
+
+DATA_SESSION = f"{DOMAIN}_session"
+DATA_TRANSPORT = f"{DOMAIN}_transport"
+
+CONF_TRANSPORT = "transport"
+CONF_MODE = "mode"
+CONF_PATH = "path"
+CONF_BASE_URL = "base_url"
+CONF_LATENCY = "latency"
+CONF_ERROR_RATE = "error_rate"
+
+MODE_HTTP = "http"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+TRANSPORT_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_MODE, default=MODE_HTTP): vol.In(
+            [MODE_HTTP, MODE_RECORD, MODE_REPLAY]
+        ),
+        vol.Optional(CONF_BASE_URL, default=HOST): cv.url,
+        vol.Optional(CONF_PATH): cv.string,
+        vol.Optional(CONF_LATENCY, default=0.0): vol.Coerce(float),
+        vol.Optional(CONF_ERROR_RATE, default=0.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=1)
+        ),
+    }
+)
+
+
+class TransportError(Exception):
+    """The request could not be carried out"""
+
+
+@dataclass(slots=True)
+class TransportResponse:
+    """Response to a transport request."""
+
+    status: int
+    text: str
+    cookies: dict[str, str] = field(default_factory=dict)
+    # Unix time at which the first of the cookies expires
+    cookies_expire: float | None = None
+
+
+class AtonTransport(ABC):
+    """Carries requests to the Aton cloud, or something standing in for it."""
+
+    @abstractmethod
+    async def async_request(
+        self,
+        method: str,
+        page: str,
+        *,
+        params: dict[str, Any] | None = None,
+        data: dict[str, Any] | None = None,
+        cookies: dict[str, str] | None = None,
+        timeout: float,
+    ) -> TransportResponse:
+        """Send a request for page and return the response.
+
+        Raises TransportError if no response could be obtained.
+        """
+
+
+def _cookie_expiry(morsel: Morsel) -> float | None:
+    """Return the unix time at which a cookie expires, None if it doesn't."""
+    if max_age := morsel["max-age"]:
+        try:
+            return time.time() + int(max_age)
+        except ValueError:
+            pass
+    if expires := morsel["expires"]:
+        try:
+            return parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+class HttpTransport(AtonTransport):
+    """Talks to the Aton cloud over an aiohttp session."""
+
+    def __init__(self, session: aiohttp.ClientSession, base_url: str = HOST) -> None:
+        self.session = session
+        self.base_url = base_url
+        self._headers = {"User-Agent": USER_AGENT}
+
+    async def async_request(
+        self,
+        method: str,
+        page: str,
+        *,
+        params: dict[str, Any] | None = None,
+        data: dict[str, Any] | None = None,
+        cookies: dict[str, str] | None = None,
+        timeout: float,
+    ) -> TransportResponse:
+        try:
+            async with self.session.request(
+                method,
+                self.base_url + page,
+                params=params,
+                data=data,
+                cookies=cookies,
+                headers=self._headers,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                allow_redirects=False,
+            ) as resp:
+                return TransportResponse(
+                    status=resp.status,
+                    text=await resp.text(),
+                    cookies={
+                        name: morsel.value for name, morsel in resp.cookies.items()
+                    },
+                    cookies_expire=min(
+                        (
+                            expire
+                            for morsel in resp.cookies.values()
+                            if (expire := _cookie_expiry(morsel)) is not None
+                        ),
+                        default=None,
+                    ),
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise TransportError(err) from err
+
+
+class RecordingTransport(AtonTransport):
+    """Saves every response of another transport to a directory.
+
+    Each response is written to <page>-<n>.json. Login responses contain
+    session cookies: treat the recordings as secrets.
+    """
+
+    def __init__(self, inner: AtonTransport, path: Path) -> None:
+        self.inner = inner
+        self.path = path
+        self._counter = itertools.count()
+
+    async def async_request(
+        self,
+        method: str,
+        page: str,
+        *,
+        params: dict[str, Any] | None = None,
+        data: dict[str, Any] | None = None,
+        cookies: dict[str, str] | None = None,
+        timeout: float,
+    ) -> TransportResponse:
+        response = await self.inner.async_request(
+            method, page, params=params, data=data, cookies=cookies, timeout=timeout
+        )
+        target = self.path / f"{Path(page).stem}-{next(self._counter):06d}.json"
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._write, target, asdict(response)
+        )
+        return response
+
+    def _write(self, target: Path, response: dict[str, Any]) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        target.write_text(json.dumps(response), encoding="utf-8")
+
+
+class ReplayTransport(AtonTransport):
+    """Serves the responses saved by RecordingTransport.
+
+    The responses for each page are replayed in order, starting over once
+    they run out. Every request waits latency seconds (with up to 50% of
+    random jitter) and fails with probability error_rate.
+    """
+
+    def __init__(
+        self, path: Path, latency: float = 0.0, error_rate: float = 0.0
+    ) -> None:
+        self.path = path
+        self.latency = latency
+        self.error_rate = error_rate
+        self._responses: dict[str, itertools.cycle] = {}
+        self._lock = asyncio.Lock()
+
+    async def async_request(
+        self,
+        method: str,
+        page: str,
+        *,
+        params: dict[str, Any] | None = None,
+        data: dict[str, Any] | None = None,
+        cookies: dict[str, str] | None = None,
+        timeout: float,
+    ) -> TransportResponse:
+        stem = Path(page).stem
+        async with self._lock:
+            if stem not in self._responses:
+                recorded = await asyncio.get_running_loop().run_in_executor(
+                    None, self._load, stem
+                )
+                if not recorded:
+                    raise TransportError(f"No recorded responses for {page}")
+                self._responses[stem] = itertools.cycle(recorded)
+        delay = self.latency * random.uniform(0.5, 1.5)
+        if delay > timeout:
+            await asyncio.sleep(timeout)
+            raise TransportError(f"Replayed {page} timed out")
+        await asyncio.sleep(delay)
+        if random.random() < self.error_rate:
+            raise TransportError(f"Injected error for {page}")
+        return next(self._responses[stem])
+
+    def _load(self, stem: str) -> list[TransportResponse]:
+        return [
+            TransportResponse(**json.loads(file.read_text(encoding="utf-8")))
+            for file in sorted(self.path.glob(f"{stem}-*.json"))
+        ]
+
+
+@callback
+def async_get_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the session shared by every Aton client.
+
+    The session reuses Home Assistant's pooled connector so keep-alive
+    connections to the cloud survive between polls, but it never stores
+    cookies: each account sends its own, so two plants can't end up sharing
+    a PHP session through a common cookie jar.
+    """
+    if (session := hass.data.get(DATA_SESSION)) is None:
+        session = hass.data[DATA_SESSION] = async_create_clientsession(
+            hass, cookie_jar=aiohttp.DummyCookieJar()
+        )
+    return session
+
+
+@callback
+def async_get_transport(hass: HomeAssistant) -> AtonTransport:
+    """Return the transport configured in configuration.yaml."""
+    transport = hass.data.get(DATA_TRANSPORT)
+    if isinstance(transport, AtonTransport):
+        return transport
+
+    config = TRANSPORT_SCHEMA(transport or {})
+    mode = config[CONF_MODE]
+    if mode == MODE_REPLAY:
+        transport = ReplayTransport(
+            Path(hass.config.path(config.get(CONF_PATH, DOMAIN))),
+            config[CONF_LATENCY],
+            config[CONF_ERROR_RATE],
+        )
+    else:
+        transport = HttpTransport(async_get_session(hass), config[CONF_BASE_URL])
+        if mode == MODE_RECORD:
+            transport = RecordingTransport(
+                transport, Path(hass.config.path(config.get(CONF_PATH, DOMAIN)))
+            )
+    if mode != MODE_HTTP:
+        _LOGGER.warning("Aton requests are going through the %s transport", mode)
+    hass.data[DATA_TRANSPORT] = transport
+    return transport
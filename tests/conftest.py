@@ -0,0 +1,27 @@
+"""Fixtures and helpers for the Aton Storage unit tests.
+
+Run from the repository root with:
+
+    pip install -r tests/requirements.txt
+    pytest tests
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.aton_storage.api import AtonSnapshot
+
+pytest_plugins = ["pytest_homeassistant_custom_component"]
+
+START = datetime(2024, 3, 1, 12, tzinfo=dt_util.UTC)
+
+
+def snapshot(seconds: float = 0, **fields) -> AtonSnapshot:
+    """Return a snapshot taken the given seconds after START."""
+    return AtonSnapshot(
+        fetched_at=START + timedelta(seconds=seconds),
+        last_update="01/03/2024 12:00:00",
+        **fields,
+    )
@@ -0,0 +1,151 @@
+"""Tests of the archive of the raw payloads."""
+from __future__ import annotations
+
+import csv
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.aton_storage import archive as archive_module
+from custom_components.aton_storage.archive import (
+    FILE_SUFFIX,
+    AtonArchive,
+    export_csv,
+    iter_records,
+    pack_payload,
+)
+
+from .conftest import START
+
+PAYLOAD = {
+    "soc": "55.5",
+    "pUtenze": "400",
+    "pSolare": "900",
+    "pBatteria": "-100",
+    "pRete": "-400",
+    "status": "20",
+    "eVenduta": "10",
+    "ePannelli": "20",
+    "eBatteria": "30",
+    "eComprata": "40",
+    "utenzeV": "230",
+    "gridV": "231",
+    "gridHz": "50",
+    "data": "01/03/2024 12:00:00",
+}
+END = START + timedelta(hours=1)
+
+
+@pytest.fixture
+def archive(hass: HomeAssistant, tmp_path: Path) -> AtonArchive:
+    """Return an archive writing in a temporary directory."""
+    archive = AtonArchive(hass, "SN", keep_days=0)
+    archive.path = tmp_path / "archive"
+    return archive
+
+
+def _write_batch(archive: AtonArchive, seconds: range) -> int:
+    """Write a batch of records taken seconds after START.
+
+    Returns the size of the file of the day afterwards.
+    """
+    batch = []
+    for second in seconds:
+        fetched_at = START + timedelta(seconds=second)
+        batch.append((fetched_at.date(), pack_payload(fetched_at, PAYLOAD)))
+    archive._write(batch)
+    return _file(archive).stat().st_size
+
+
+def _file(archive: AtonArchive) -> Path:
+    return archive.path / f"{START.date().isoformat()}{FILE_SUFFIX}"
+
+
+def _read_seconds(archive: AtonArchive) -> list[int]:
+    """Return the seconds after START of the records read back."""
+    return [
+        round(record[0] - START.timestamp())
+        for record in iter_records(archive.path, START, END)
+    ]
+
+
+@pytest.mark.parametrize("read_size", [65536, 7, 1])
+def test_round_trip(
+    archive: AtonArchive, monkeypatch: pytest.MonkeyPatch, read_size: int
+) -> None:
+    """Test every batch is read back, whatever the size of the reads."""
+    monkeypatch.setattr(archive_module, "_READ_SIZE", read_size)
+    for batch in range(5):
+        _write_batch(archive, range(batch * 3, batch * 3 + 3))
+
+    assert _read_seconds(archive) == list(range(15))
+    record = next(iter_records(archive.path, START, END))
+    assert record[2:4] == (55.5, 400)
+
+
+def test_range(archive: AtonArchive) -> None:
+    """Test only the records taken within the range are read."""
+    _write_batch(archive, range(10))
+    start, end = START + timedelta(seconds=3), START + timedelta(seconds=6)
+    records = list(iter_records(archive.path, start, end))
+    assert [record[0] for record in records] == [
+        (START + timedelta(seconds=second)).timestamp() for second in range(3, 7)
+    ]
+
+
+def test_export_csv(archive: AtonArchive, tmp_path: Path) -> None:
+    """Test the export writes a header and a row per record."""
+    _write_batch(archive, range(3))
+    _write_batch(archive, range(3, 6))
+    output = tmp_path / "exports" / "export.csv"
+    assert export_csv(archive.path, START, END, output) == 6
+
+    with output.open(encoding="utf-8") as file:
+        rows = list(csv.reader(file))
+    assert rows[0][:4] == ["fetched_at", "data", "soc", "pUtenze"]
+    assert rows[1][0] == START.isoformat()
+    assert rows[1][2:4] == ["55.5", "400"]
+    assert len(rows) == 7
+
+
+@pytest.mark.parametrize("read_size", [65536, 7])
+def test_truncated_batch(
+    archive: AtonArchive, monkeypatch: pytest.MonkeyPatch, read_size: int
+) -> None:
+    """Test a batch cut short by a crash doesn't hide the ones appended later."""
+    monkeypatch.setattr(archive_module, "_READ_SIZE", read_size)
+    first = _write_batch(archive, range(4))
+    second = _write_batch(archive, range(4, 8))
+    file = _file(archive)
+    with file.open("r+b") as out:
+        out.truncate((first + second) // 2)
+    _write_batch(archive, range(8, 10))
+    _write_batch(archive, range(10, 12))
+
+    assert _read_seconds(archive) == [0, 1, 2, 3, 8, 9, 10, 11]
+
+
+def test_truncated_tail(archive: AtonArchive) -> None:
+    """Test a batch cut short at the end of a file is skipped."""
+    _write_batch(archive, range(4))
+    size = _write_batch(archive, range(4, 8))
+    with _file(archive).open("r+b") as out:
+        out.truncate(size - 5)
+
+    assert _read_seconds(archive) == [0, 1, 2, 3]
+
+
+def test_corrupted_batch(archive: AtonArchive) -> None:
+    """Test a batch failing its checksum is skipped alone."""
+    first = _write_batch(archive, range(4))
+    _write_batch(archive, range(4, 8))
+    file = _file(archive)
+    data = bytearray(file.read_bytes())
+    # The CRC-32 of a member is followed by its 4-byte length
+    data[first - 8] ^= 1
+    file.write_bytes(bytes(data))
+
+    assert _read_seconds(archive) == [4, 5, 6, 7]
@@ -0,0 +1,105 @@
+"""Tests of the battery charge time estimates."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.aton_storage.battery import BatteryEstimator, SlidingLinearFit
+
+from .conftest import snapshot
+
+
+def test_fit() -> None:
+    """Test the line through the samples and their expiry."""
+    fit = SlidingLinearFit(600)
+    assert fit.slope is None
+    fit.add(0, 10)
+    assert fit.slope is None
+
+    fit.add(60, 12)
+    fit.add(120, 14)
+    assert fit.count == 3
+    assert fit.span == 120
+    assert fit.slope == pytest.approx(2 / 60)
+    assert fit.value_at(300) == pytest.approx(20)
+
+    # The earlier samples leave the window, the line follows the new ones
+    fit.add(660, 0)
+    fit.add(720, -4)
+    assert fit.count == 2
+    assert fit.slope == pytest.approx(-1 / 15)
+
+
+def test_fit_same_time() -> None:
+    """Test samples taken at the same time have no slope."""
+    fit = SlidingLinearFit(600)
+    fit.add(0, 10)
+    fit.add(0, 20)
+    assert fit.slope is None
+    assert fit.value_at(0) is None
+
+
+def test_fit_rebase() -> None:
+    """Test the fit keeps its precision over days of epoch timestamps."""
+    fit = SlidingLinearFit(1800)
+    start = 1.7e9
+    for minute in range(3 * 24 * 60):
+        fit.add(start + minute * 60, 50 + minute * 0.01)
+    assert fit.slope == pytest.approx(0.01 / 60)
+    assert fit.value_at(start + 3 * 86400) == pytest.approx(50 + 3 * 24 * 60 * 0.01)
+
+
+def _battery(seconds: float, status: float, charging: bool = True):
+    """Return a snapshot of the battery charging from the panels or
+    discharging into the house.
+    """
+    return snapshot(
+        seconds,
+        battery_status=status,
+        battery_power=1000 if charging else -1000,
+        is_solar_to_battery=charging,
+        is_battery_to_house=not charging,
+    )
+
+
+def test_time_to_full() -> None:
+    """Test the time to full charge of a battery gaining 1% a minute."""
+    estimator = BatteryEstimator(1800, reserve=20)
+    estimator.update(_battery(0, 50))
+    estimator.update(_battery(60, 51))
+    assert estimator.time_to_full is None
+
+    estimator.update(_battery(120, 52))
+    assert estimator.time_to_full == 48
+    assert estimator.time_to_reserve is None
+
+
+def test_time_to_reserve() -> None:
+    """Test the time to the reserve of a battery losing 0.5% a minute."""
+    estimator = BatteryEstimator(1800, reserve=20)
+    for minute in range(3):
+        estimator.update(_battery(minute * 60, 50 - minute * 0.5, charging=False))
+    assert estimator.time_to_reserve == 58
+    assert estimator.time_to_full is None
+
+
+def test_direction_change() -> None:
+    """Test the fit starts over when the battery changes direction."""
+    estimator = BatteryEstimator(1800, reserve=20)
+    for minute in range(3):
+        estimator.update(_battery(minute * 60, 50 + minute))
+    assert estimator.time_to_full is not None
+
+    estimator.update(_battery(180, 52, charging=False))
+    estimator.update(_battery(240, 51, charging=False))
+    assert (estimator.time_to_full, estimator.time_to_reserve) == (None, None)
+    estimator.update(_battery(300, 50, charging=False))
+    assert estimator.time_to_reserve == 30
+
+
+def test_idle() -> None:
+    """Test an idle battery has no estimates."""
+    estimator = BatteryEstimator(1800, reserve=20)
+    for minute in range(3):
+        estimator.update(_battery(minute * 60, 50 + minute))
+    estimator.update(snapshot(180, battery_status=53, battery_power=0))
+    assert (estimator.time_to_full, estimator.time_to_reserve) == (None, None)
@@ -0,0 +1,179 @@
+"""Tests of the energy integrated from the power flows."""
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.aton_storage.energy import (
+    FLOWS,
+    FlowEnergyIntegrator,
+    flow_powers,
+)
+
+from .conftest import snapshot
+
+# Seconds between two samples, within FLOW_ENERGY_MAX_GAP
+STEP = 900
+
+
+@pytest.mark.parametrize(
+    ("powers", "flags", "expected"),
+    [
+        # Idle
+        ((0, 0, 0), (), {}),
+        # Night, the house on the grid
+        ((400, 0, 0), ("grid_to_house",), {"grid_house": 400}),
+        # The panels serve the house, then the battery, then the grid
+        (
+            (500, 3000, 1000),
+            ("solar_to_house", "solar_to_battery", "solar_to_grid"),
+            {"solar_house": 500, "solar_battery": 1000, "solar_grid": 1500},
+        ),
+        (
+            (500, 2000, 0),
+            ("solar_to_house", "solar_to_grid"),
+            {"solar_house": 500, "solar_grid": 1500},
+        ),
+        # The battery covers what the panels don't, then the grid
+        (
+            (700, 200, -500),
+            ("solar_to_house", "battery_to_house"),
+            {"solar_house": 200, "battery_house": 500},
+        ),
+        (
+            (1000, 200, -500),
+            ("solar_to_house", "battery_to_house", "grid_to_house"),
+            {"solar_house": 200, "battery_house": 500, "grid_house": 300},
+        ),
+        # The battery serves the house first, the rest goes to the grid
+        (
+            (400, 0, -1000),
+            ("battery_to_house", "battery_to_grid"),
+            {"battery_house": 400, "battery_grid": 600},
+        ),
+        # The grid charges the battery with what the panels don't give
+        (
+            (0, 800, 1500),
+            ("solar_to_battery", "grid_to_battery"),
+            {"solar_battery": 800, "grid_battery": 700},
+        ),
+        (
+            (300, 0, 2000),
+            ("grid_to_battery", "grid_to_house"),
+            {"grid_battery": 2000, "grid_house": 300},
+        ),
+    ],
+)
+def test_flow_powers(
+    powers: tuple[int, int, int], flags: tuple[str, ...], expected: dict[str, int]
+) -> None:
+    """Test the split of the powers for each combination of directions."""
+    house, solar, battery = powers
+    data = snapshot(
+        house_consumption=house,
+        solar_production=solar,
+        battery_power=battery,
+        **{f"is_{flag}": True for flag in flags},
+    )
+    assert flow_powers(data) == [expected.get(flow, 0) for flow in FLOWS]
+
+
+def _exporting(seconds: float, sold_energy: int | None = None):
+    """Return a snapshot sending 1000 W of the panels and 500 W of the battery
+    to the grid.
+    """
+    return snapshot(
+        seconds,
+        house_consumption=0,
+        solar_production=1000,
+        battery_power=-500,
+        is_solar_to_grid=True,
+        is_battery_to_grid=True,
+        sold_energy=sold_energy,
+    )
+
+
+async def test_drift_split(hass: HomeAssistant) -> None:
+    """Test the drift of a cloud step is shared like the integrated energy."""
+    energy = FlowEnergyIntegrator(hass, "entry")
+    energy.update(_exporting(0, sold_energy=0))
+    energy.update(_exporting(STEP, sold_energy=0))
+    assert energy.value("solar_grid") == 250
+    assert energy.value("battery_grid") == 125
+
+    # 750 Wh integrated against a 900 Wh step: 150 Wh of drift, split 2 to 1
+    energy.update(_exporting(2 * STEP, sold_energy=900))
+    assert energy.value("solar_grid") == pytest.approx(600)
+    assert energy.value("battery_grid") == pytest.approx(300)
+
+
+async def test_overshoot_becomes_debt(hass: HomeAssistant) -> None:
+    """Test an overshoot is taken from the following increments."""
+    energy = FlowEnergyIntegrator(hass, "entry")
+    energy.update(_exporting(0, sold_energy=0))
+    energy.update(_exporting(STEP, sold_energy=0))
+    # 750 Wh integrated against a 600 Wh step: 100 + 50 Wh of debt
+    energy.update(_exporting(2 * STEP, sold_energy=600))
+    assert energy.value("solar_grid") == pytest.approx(500)
+    assert energy.value("battery_grid") == pytest.approx(250)
+
+    energy.update(_exporting(3 * STEP, sold_energy=600))
+    assert energy.value("solar_grid") == pytest.approx(650)
+    assert energy.value("battery_grid") == pytest.approx(325)
+
+
+async def test_cloud_reset(hass: HomeAssistant) -> None:
+    """Test the daily reset of a cloud counter is not reconciled."""
+    energy = FlowEnergyIntegrator(hass, "entry")
+    energy.update(_exporting(0, sold_energy=5000))
+    energy.update(_exporting(STEP, sold_energy=0))
+    energy.update(_exporting(2 * STEP, sold_energy=0))
+    assert energy.value("solar_grid") == 500
+    assert energy.value("battery_grid") == 250
+
+
+async def test_never_decreases(hass: HomeAssistant) -> None:
+    """Test no counter decreases, whatever the cloud counters do."""
+    rng = random.Random(1)
+    energy = FlowEnergyIntegrator(hass, "entry")
+    counters = {
+        "sold_energy": 0,
+        "bought_energy": 0,
+        "self_consumed_energy": 0,
+        "solar_energy": 0,
+    }
+    previous = list(energy.values)
+    seconds = 0.0
+    for _ in range(500):
+        seconds += rng.uniform(1, 2 * STEP)
+        for field in counters:
+            if rng.random() < 0.02:
+                counters[field] = 0
+            elif rng.random() < 0.3:
+                counters[field] += rng.randint(0, 500)
+        energy.update(
+            snapshot(
+                seconds,
+                house_consumption=rng.randint(0, 3000),
+                solar_production=rng.randint(0, 5000),
+                battery_power=rng.randint(-3000, 3000),
+                **{
+                    f"is_{flag}": rng.random() < 0.5
+                    for flag in (
+                        "grid_to_house",
+                        "solar_to_battery",
+                        "solar_to_grid",
+                        "battery_to_house",
+                        "solar_to_house",
+                        "grid_to_battery",
+                        "battery_to_grid",
+                    )
+                },
+                **counters,
+            )
+        )
+        assert all(after >= before for before, after in zip(previous, energy.values))
+        previous = list(energy.values)
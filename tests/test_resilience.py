@@ -0,0 +1,79 @@
+"""Tests of the retry and circuit breaker helpers."""
+from __future__ import annotations
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.aton_storage import resilience
+from custom_components.aton_storage.resilience import (
+    BreakerState,
+    CircuitBreaker,
+    backoff_delay,
+)
+
+
+def test_backoff_delay() -> None:
+    """Test the delay is jittered up to an exponential bound, then capped."""
+    random.seed(1)
+    for attempt, bound in ((0, 2), (1, 4), (2, 8), (5, 30), (10, 30)):
+        delays = [backoff_delay(attempt, 2, 30) for _ in range(200)]
+        assert all(0 <= delay <= bound for delay in delays)
+        assert max(delays) > bound * 0.9
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """Replace the monotonic clock of the breaker with a settable one."""
+    now = [1000.0]
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_breaker_opens(clock: list[float]) -> None:
+    """Test the breaker opens after the threshold of consecutive failures."""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=300)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state is BreakerState.CLOSED
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state is BreakerState.OPEN
+    assert not breaker.allow_request()
+    clock[0] += 299
+    assert not breaker.allow_request()
+
+
+def test_breaker_probe_success(clock: list[float]) -> None:
+    """Test a single probe is let through, and its success closes the breaker."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=300)
+    breaker.record_failure()
+    clock[0] += 300
+    assert breaker.state is BreakerState.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state is BreakerState.CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow_request()
+
+
+def test_breaker_probe_failure(clock: list[float]) -> None:
+    """Test the failure of the probe opens the breaker again."""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=300)
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] += 300
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state is BreakerState.OPEN
+    assert not breaker.allow_request()
+    clock[0] += 300
+    assert breaker.allow_request()
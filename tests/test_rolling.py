@@ -0,0 +1,72 @@
+"""Tests of the rolling power statistics."""
+from __future__ import annotations
+
+import random
+import statistics
+
+import pytest
+
+from custom_components.aton_storage.rolling import RollingStats, RollingWindow
+
+from .conftest import snapshot
+
+
+def test_window() -> None:
+    """Test the samples leave the window once older than it."""
+    window = RollingWindow(60, 100)
+    assert (window.min, window.max, window.mean) == (None, None, None)
+
+    for time, value in ((0, 5), (10, 1), (20, 3)):
+        window.add(time, value)
+    assert (window.min, window.max, window.mean) == (1, 5, 3)
+
+    window.add(61, 4)
+    assert (window.min, window.max) == (1, 4)
+    assert window.mean == pytest.approx(8 / 3)
+
+    window.add(75, 2)
+    assert (window.min, window.max, window.mean) == (2, 4, 3)
+
+
+def test_capacity() -> None:
+    """Test the oldest samples are dropped early when the buffer is full."""
+    window = RollingWindow(100, 3)
+    for time, value in enumerate((9, 1, 2, 3)):
+        window.add(time, value)
+    assert (window.min, window.max, window.mean) == (1, 3, 2)
+
+
+def test_matches_brute_force() -> None:
+    """Test the window against a recomputation over its samples."""
+    rng = random.Random(1)
+    window = RollingWindow(60, 40)
+    samples: list[tuple[float, float]] = []
+    time = 0.0
+    for _ in range(2000):
+        time += rng.choice((0.5, 1.0, 5.0, 30.0, 90.0))
+        value = rng.randint(-3000, 3000)
+        window.add(time, value)
+        samples.append((time, value))
+        kept = [value for sample_time, value in samples if sample_time > time - 60]
+        kept = kept[-40:]
+        assert window.min == min(kept)
+        assert window.max == max(kept)
+        assert window.mean == pytest.approx(statistics.fmean(kept))
+
+
+def test_stats() -> None:
+    """Test every field feeds its windows, the grid with the sign flipped."""
+    stats = RollingStats(min_interval=10)
+    stats.update(snapshot(0, house_consumption=500, grid_power=-200, battery_power=0))
+    stats.update(
+        snapshot(30, house_consumption=700, grid_power=300, battery_power=-400)
+    )
+    stats.update(snapshot(90, house_consumption=600, grid_power=100, battery_power=100))
+
+    assert stats.get("home", 60).max == 600
+    assert stats.get("home", 900).max == 700
+    assert stats.get("home", 900).mean == 600
+    assert stats.get("grid_power", 60).min == -100
+    assert stats.get("grid_power", 3600).min == -300
+    assert stats.get("grid_power", 3600).max == 200
+    assert stats.get("battery_power", 900).min == -400
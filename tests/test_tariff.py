@@ -0,0 +1,135 @@
+"""Tests of the cost and revenue of the energy exchanged with the grid."""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.aton_storage.tariff import (
+    F1,
+    F2,
+    F3,
+    CostTracker,
+    TariffSchedule,
+    italian_holidays,
+)
+
+from .conftest import START, snapshot
+
+# Same prices in every band, per kWh
+BUY = 0.25
+SELL = 0.1
+MONDAY = date(2024, 3, 4)
+TUESDAY = MONDAY + timedelta(days=1)
+
+
+def _at(day: date, hour: int, minute: int = 0) -> datetime:
+    return dt_util.start_of_local_day(day) + timedelta(hours=hour, minutes=minute)
+
+
+def _reading(when: datetime, bought: int, sold: int = 0):
+    """Return a snapshot with the given cloud counters."""
+    return snapshot(
+        (when - START).total_seconds(), bought_energy=bought, sold_energy=sold
+    )
+
+
+@pytest.fixture
+def tracker(hass: HomeAssistant) -> CostTracker:
+    """Return a tracker with the same prices in every band."""
+    return CostTracker(hass, "entry", TariffSchedule((BUY,) * 3, (SELL,) * 3))
+
+
+def test_bands() -> None:
+    """Test the band of weekdays, Saturdays, Sundays and holidays."""
+    schedule = TariffSchedule((0, 0, 0), (0, 0, 0))
+    assert schedule.band(datetime(2024, 3, 4, 10)) == F1
+    assert schedule.band(datetime(2024, 3, 4, 7, 30)) == F2
+    assert schedule.band(datetime(2024, 3, 4, 23)) == F3
+    assert schedule.band(datetime(2024, 3, 9, 10)) == F2
+    assert schedule.band(datetime(2024, 3, 10, 10)) == F3
+    # Easter Monday
+    assert schedule.band(datetime(2024, 4, 1, 10)) == F3
+    assert date(2025, 4, 21) in italian_holidays(2025)
+
+
+def test_cost(tracker: CostTracker) -> None:
+    """Test the energy bought and sold is priced as the counters grow."""
+    tracker.update(_reading(_at(MONDAY, 10), 1000, 2000))
+    assert (tracker.daily_cost, tracker.daily_revenue) == (0, 0)
+
+    tracker.update(_reading(_at(MONDAY, 11), 3000, 7000))
+    assert tracker.daily_cost == pytest.approx(2 * BUY)
+    assert tracker.daily_revenue == pytest.approx(5 * SELL)
+    assert tracker.monthly_cost == tracker.daily_cost
+
+
+def test_glitch(tracker: CostTracker) -> None:
+    """Test a counter going back during the day adds nothing."""
+    tracker.update(_reading(_at(MONDAY, 10), 5_000_000))
+    tracker.update(_reading(_at(MONDAY, 10, 5), 4_999_990))
+    assert tracker.daily_cost == 0
+
+    # Nor does its recovery
+    tracker.update(_reading(_at(MONDAY, 10, 10), 5_000_000))
+    assert tracker.daily_cost == 0
+    tracker.update(_reading(_at(MONDAY, 10, 15), 5_001_000))
+    assert tracker.daily_cost == pytest.approx(BUY)
+
+
+def test_glitch_to_zero(tracker: CostTracker) -> None:
+    """Test a counter read as zero during the day adds nothing."""
+    tracker.update(_reading(_at(MONDAY, 10), 5_000_000))
+    tracker.update(_reading(_at(MONDAY, 10, 5), 0))
+    tracker.update(_reading(_at(MONDAY, 10, 10), 5_000_000))
+    assert tracker.daily_cost == 0
+
+
+def test_daily_reset(tracker: CostTracker) -> None:
+    """Test the restart of a counter after midnight counts from zero."""
+    tracker.update(_reading(_at(MONDAY, 23, 50), 8000))
+    tracker.update(_reading(_at(MONDAY, 23, 55), 9000))
+    assert tracker.daily_cost == pytest.approx(BUY)
+
+    tracker.update(_reading(_at(TUESDAY, 0, 5), 200))
+    assert tracker.day == TUESDAY
+    assert tracker.daily_cost == pytest.approx(0.2 * BUY)
+    assert tracker.monthly_cost == pytest.approx(1.2 * BUY)
+
+    # Once a day only
+    tracker.update(_reading(_at(TUESDAY, 10), 5000))
+    tracker.update(_reading(_at(TUESDAY, 10, 5), 100))
+    assert tracker.daily_cost == pytest.approx(5 * BUY)
+
+
+def test_late_reset(tracker: CostTracker) -> None:
+    """Test a counter restarting a few polls after midnight."""
+    tracker.update(_reading(_at(MONDAY, 23, 55), 9000))
+    tracker.update(_reading(_at(TUESDAY, 0, 5), 9100))
+    tracker.update(_reading(_at(TUESDAY, 0, 10), 50))
+    assert tracker.daily_cost == pytest.approx(0.15 * BUY)
+
+
+def test_zero_at_midnight(tracker: CostTracker) -> None:
+    """Test a counter at zero over midnight has no restart to come."""
+    tracker.update(_reading(_at(MONDAY, 23, 55), 9000, 0))
+    tracker.update(_reading(_at(TUESDAY, 0, 5), 100, 0))
+    tracker.update(_reading(_at(TUESDAY, 10), 100, 3000))
+    tracker.update(_reading(_at(TUESDAY, 10, 5), 100, 2990))
+    tracker.update(_reading(_at(TUESDAY, 10, 10), 100, 3000))
+    assert tracker.daily_revenue == pytest.approx(3 * SELL)
+
+
+async def test_restore(hass: HomeAssistant, tracker: CostTracker) -> None:
+    """Test the counters and the pending restarts survive a restart."""
+    tracker.update(_reading(_at(MONDAY, 23, 55), 9000))
+    tracker.update(_reading(_at(TUESDAY, 0, 5), 9100))
+    await tracker.async_save()
+
+    restored = CostTracker(hass, "entry", tracker.schedule)
+    await restored.async_load()
+    restored.update(_reading(_at(TUESDAY, 0, 10), 50))
+    assert restored.daily_cost == pytest.approx(0.15 * BUY)
@@ -0,0 +1,198 @@
+"""Local stand-in for the Aton cloud, for load testing the integration.
+
+Serves the login and monitor pages for any number of fake plants. Plant n
+logs in as user plantN with password "password" and gets serial FAKE0000N.
+Power values follow a smooth daily curve with some noise, and the energy
+counters grow with them.
+
+    python tools/fake_aton_server.py --plants 100 --port 8099
+
+then point the integration at it in configuration.yaml:
+
+    aton_storage:
+      transport:
+        base_url: http://127.0.0.1:8099/atonTC/
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+import json
+import math
+import random
+import secrets
+import time
+
+from aiohttp import web
+
+PASSWORD = "password"
+
+
+@dataclass
+class FakePlant:
+    """State of one fake plant."""
+
+    index: int
+    sn: str
+    # Energy counters, in Wh
+    sold: float = 0.0
+    solar: float = 0.0
+    battery: float = 0.0
+    bought: float = 0.0
+    soc: float = 50.0
+    updated: float = field(default_factory=time.monotonic)
+
+    def monitor(self) -> dict:
+        """Advance the plant to now and return its get_monitor payload."""
+        now = time.monotonic()
+        hours = (now - self.updated) / 3600
+        self.updated = now
+
+        day = time.localtime()
+        day_fraction = (day.tm_hour * 3600 + day.tm_min * 60 + day.tm_sec) / 86400
+        solar = max(0.0, math.sin((day_fraction - 0.25) * 2 * math.pi)) * 4000
+        solar = int(solar * random.uniform(0.9, 1.1))
+        house = int(300 + 700 * random.random() + (50 * self.index) % 200)
+        surplus = solar - house
+        if surplus > 0 and self.soc < 100:
+            battery = -min(surplus, 2500)
+        elif surplus < 0 and self.soc > 10:
+            battery = min(-surplus, 2500)
+        else:
+            battery = 0
+        grid = house - solar - battery
+
+        self.soc = min(100.0, max(0.0, self.soc - battery * hours / 100))
+        self.solar += solar * hours
+        if battery > 0:
+            self.battery += battery * hours
+        if grid > 0:
+            self.bought += grid * hours
+        else:
+            self.sold -= grid * hours
+
+        status = 0
+        if grid > 0:
+            status |= 1 if battery >= 0 else 32
+        if battery < 0 and solar > 0:
+            status |= 2
+        if grid < 0:
+            status |= 4 if battery >= 0 else 64
+        if battery > 0:
+            status |= 8
+        if solar > 0:
+            status |= 16
+
+        return {
+            "soc": round(self.soc, 1),
+            "pUtenze": house,
+            "pBatteria": battery,
+            "pSolare": solar,
+            "pRete": grid,
+            "status": status,
+            "data": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+            "eVenduta": int(self.sold),
+            "ePannelli": int(self.solar),
+            "eBatteria": int(self.battery),
+            "eComprata": int(self.bought),
+            "utenzeV": round(random.uniform(228, 232), 1),
+            "gridV": round(random.uniform(228, 232), 1),
+            "gridHz": round(random.uniform(49.95, 50.05), 2),
+        }
+
+
+class FakeAtonServer:
+    """aiohttp application emulating the Aton cloud pages."""
+
+    def __init__(
+        self, plants: int, latency: float, error_rate: float, session_ttl: int
+    ) -> None:
+        self.plants = {
+            f"plant{n}": FakePlant(n, f"FAKE{n:05d}") for n in range(1, plants + 1)
+        }
+        self.latency = latency
+        self.error_rate = error_rate
+        self.session_ttl = session_ttl
+        # PHPSESSID -> (username, expiry)
+        self.sessions: dict[str, tuple[str, float]] = {}
+        self.app = web.Application(middlewares=[self._chaos])
+        self.app.router.add_post("/atonTC/index.php", self.login)
+        self.app.router.add_get("/atonTC/set_request.php", self.set_request)
+        self.app.router.add_get("/atonTC/get_monitor.php", self.get_monitor)
+
+    @web.middleware
+    async def _chaos(self, request: web.Request, handler):
+        if self.latency:
+            await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        if random.random() < self.error_rate:
+            raise web.HTTPServiceUnavailable()
+        return await handler(request)
+
+    def _plant(self, request: web.Request) -> FakePlant:
+        session = self.sessions.get(request.cookies.get("PHPSESSID", ""))
+        if session is None or session[1] < time.time():
+            raise web.HTTPUnauthorized()
+        plant = self.plants[session[0]]
+        if request.query.get("sn") != plant.sn:
+            raise web.HTTPUnauthorized()
+        return plant
+
+    async def login(self, request: web.Request) -> web.Response:
+        """Log in and return a page carrying sn and idImpianto."""
+        form = await request.post()
+        plant = self.plants.get(form.get("username", ""))
+        if plant is None or form.get("password") != PASSWORD:
+            return web.Response(text="<html>Login</html>", content_type="text/html")
+        session_id = secrets.token_hex(16)
+        self.sessions[session_id] = (form["username"], time.time() + self.session_ttl)
+        response = web.Response(
+            text=(
+                "<html><script>\n"
+                f'var sn = "{plant.sn}";\n'
+                f"var idImpianto = {plant.index};\n"
+                "</script></html>"
+            ),
+            content_type="text/html",
+        )
+        response.set_cookie("PHPSESSID", session_id, max_age=self.session_ttl)
+        return response
+
+    async def set_request(self, request: web.Request) -> web.Response:
+        """Acknowledge the monitor request."""
+        self._plant(request)
+        return web.Response(text="ok")
+
+    async def get_monitor(self, request: web.Request) -> web.Response:
+        """Return the live status of the plant."""
+        return web.Response(
+            text=json.dumps(self._plant(request).monitor()),
+            content_type="application/json",
+        )
+
+
+def main() -> None:
+    """Run the fake server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--plants", type=int, default=10)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="mean delay of each reply"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction of 503 replies"
+    )
+    parser.add_argument(
+        "--session-ttl", type=int, default=3600, help="seconds before a login expires"
+    )
+    args = parser.parse_args()
+    server = FakeAtonServer(
+        args.plants, args.latency, args.error_rate, args.session_ttl
+    )
+    web.run_app(server.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()